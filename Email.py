@@ -1,5 +1,8 @@
 import smtplib
 import os
+import threading
+import time
+from concurrent.futures import Future
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
@@ -7,52 +10,240 @@ from email import encoders
 from dotenv import load_dotenv
 load_dotenv()
 
-def send_email_alert(label, confidence_score, receiver_email, frame_path=None):
+# Errors after which the connection is dropped and the send retried once on a new connection.
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+class Mailer:
     """
-    Sends an email alert when a fall is detected, with an optional frame attachment.
-    :param label: The label associated with the detected event (e.g., 'Fall Detected').
-    :param confidence_score: The confidence score of the detection.
-    :param receiver_email: The recipient email address to send the alert.
-    :param frame_path: Path to the captured frame image to attach.
+    Reusable SMTP client that keeps one authenticated connection open between alerts and
+    reconnects when the server has dropped it, instead of connecting and logging in for
+    every message.
+
+    In digest mode, alerts for the same recipient arriving within `digest_window` seconds
+    are collected and sent as a single message with every frame attached.
+
+    Settings default to the environment: SMTP_HOST (or SMTP_SERVER), SMTP_PORT, SMTP_SECURITY
+    ("ssl", "starttls" or "none"; inferred from the port when unset), SENDER_EMAIL,
+    SENDER_PASSWORD (login is skipped when empty) and EMAIL_DIGEST_SECONDS. To test without a
+    real account, run a local debugging server with `python -m aiosmtpd -n -l localhost:1025`
+    and use SMTP_HOST=localhost, SMTP_PORT=1025.
     """
-    try:
-        sender_email = os.getenv("SENDER_EMAIL")
-        sender_password = os.getenv("SENDER_PASSWORD")
-        smtp_host = os.getenv("SMTP_HOST", "smtp.gmail.com")
-        smtp_port = int(os.getenv("SMTP_PORT", 465))
 
-        if not sender_email or not sender_password:
-            raise ValueError("Missing sender email or password in environment variables.")
+    def __init__(self, host=None, port=None, sender=None, password=None, security=None,
+                 digest_window=None, max_attachments=10, timeout=30, check_idle=30.0):
+        self.host = host or os.getenv("SMTP_HOST") or os.getenv("SMTP_SERVER", "smtp.gmail.com")
+        self.port = int(port or os.getenv("SMTP_PORT", 465))
+        self.sender = sender or os.getenv("SENDER_EMAIL")
+        self.password = password if password is not None else os.getenv("SENDER_PASSWORD")
+        security = security or os.getenv("SMTP_SECURITY")
+        if not security:
+            security = {465: "ssl", 587: "starttls"}.get(self.port, "none")
+        self.security = security.strip().lower()
+        if digest_window is None:
+            digest_window = float(os.getenv("EMAIL_DIGEST_SECONDS", 10))
+        self.digest_window = digest_window
+        self.max_attachments = max_attachments
+        self.timeout = timeout
+        self.check_idle = check_idle
+        self._server = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+        self._digests = {}
+        self._digest_lock = threading.Lock()
+        self.stats = {"sent": 0, "connections": 0, "digests": 0}
 
-        if not receiver_email:
-            raise ValueError("Receiver email is not provided.")
+    def _connect(self):
+        if self.security == "ssl":
+            server = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.security == "starttls":
+                server.starttls()
+        if self.password:
+            server.login(self.sender, self.password)
+        self.stats["connections"] += 1
+        return server
 
-        subject = f"Alert: {label}"
-        body = f"A fall was detected with a confidence score of {confidence_score:.2f}. Please check the attached frame for details."
+    def _disconnect(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self._server = None
+
+    def _connection(self):
+        """Return a live connection, probing it with NOOP when it has been idle for a while."""
+        if self._server is not None and time.monotonic() - self._last_used > self.check_idle:
+            try:
+                if self._server.noop()[0] != 250:
+                    self._disconnect()
+            except Exception:
+                self._server = None
+        if self._server is None:
+            self._server = self._connect()
+        return self._server
+
+    def send_message(self, message, receiver_email):
+        """Send a prepared message, reconnecting and retrying once if the connection was lost."""
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    self._connection().sendmail(self.sender, receiver_email, message.as_string())
+                    self._last_used = time.monotonic()
+                    self.stats["sent"] += 1
+                    return
+                except RECONNECT_ERRORS:
+                    self._server = None
+                    if attempt:
+                        raise
+                except smtplib.SMTPResponseException as e:
+                    # 421: the server is closing the connection, e.g. after an idle timeout.
+                    if e.smtp_code != 421 or attempt:
+                        raise
+                    self._server = None
 
+    def build_message(self, receiver_email, subject, body, frames=()):
+        """
+        :param frames: (filename, data) pairs to attach, data being the bytes of the image.
+        """
         message = MIMEMultipart()
-        message["From"] = sender_email
+        message["From"] = self.sender
         message["To"] = receiver_email
         message["Subject"] = subject
         message.attach(MIMEText(body, "plain"))
+        for filename, data in frames:
+            part = MIMEBase("application", "octet-stream")
+            part.set_payload(data)
+            encoders.encode_base64(part)
+            part.add_header("Content-Disposition", f"attachment; filename={filename}")
+            message.attach(part)
+        return message
+
+    def _check(self, receiver_email):
+        if not self.sender or (self.security != "none" and not self.password):
+            raise ValueError("Missing sender email or password in environment variables.")
+        if not receiver_email:
+            raise ValueError("Receiver email is not provided.")
+
+    def send_alert(self, label, confidence_score, receiver_email, frame_path=None, frame_bytes=None):
+        """
+        Send one alert right away.
+        :param frame_path: Path to the captured frame image to attach.
+        :param frame_bytes: Encoded frame to attach instead of a file.
+        """
+        self._check(receiver_email)
+        frames = _frame_attachments(frame_path, frame_bytes, time.time())
+        body = f"A fall was detected with a confidence score of {confidence_score:.2f}. Please check the attached frame for details."
+        self.send_message(self.build_message(receiver_email, f"Alert: {label}", body, frames), receiver_email)
+
+    def queue_alert(self, label, confidence_score, receiver_email, frame_path=None, frame_bytes=None):
+        """
+        Add an alert to the recipient's digest, which is sent `digest_window` seconds after its
+        first alert. Without a digest window the alert is sent right away.
+        :return: A Future resolved once the message carrying this alert has been sent.
+        """
+        future = Future()
+        if not self.digest_window:
+            try:
+                self.send_alert(label, confidence_score, receiver_email, frame_path, frame_bytes)
+                future.set_result(f"Alert sent to {receiver_email}.")
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        self._check(receiver_email)
+        item = (time.time(), label, confidence_score, frame_path, frame_bytes, future)
+        with self._digest_lock:
+            pending = self._digests.get(receiver_email)
+            if pending is None:
+                pending = self._digests[receiver_email] = []
+                timer = threading.Timer(self.digest_window, self.flush, args=(receiver_email,))
+                timer.daemon = True
+                timer.start()
+            pending.append(item)
+        return future
+
+    def flush(self, receiver_email=None):
+        """Send the pending digest of one recipient, or of every recipient."""
+        with self._digest_lock:
+            receivers = [receiver_email] if receiver_email else list(self._digests)
+            batches = [(receiver, self._digests.pop(receiver, None)) for receiver in receivers]
+        for receiver, items in batches:
+            if items:
+                self._send_digest(receiver, items)
+
+    def _send_digest(self, receiver_email, items):
+        peak = max(item[2] for item in items)
+        labels = sorted({item[1] for item in items})
+        lines = [f"{len(items)} alerts ({', '.join(labels)}) with a peak confidence score of {peak:.2f}:"]
+        frames = []
+        for timestamp, label, confidence_score, frame_path, frame_bytes, _ in items:
+            lines.append(f"- {time.strftime('%H:%M:%S', time.localtime(timestamp))} {label}: {confidence_score:.2f}")
+            if len(frames) < self.max_attachments:
+                frames.extend(_frame_attachments(frame_path, frame_bytes, timestamp, len(frames)))
+        if len(items) > len(frames):
+            lines.append(f"{len(frames)} of the frames are attached.")
+        subject = f"Alert: {len(items)} x {', '.join(labels)}" if len(items) > 1 else f"Alert: {labels[0]}"
+        try:
+            self.send_message(self.build_message(receiver_email, subject, "\n".join(lines), frames), receiver_email)
+            self.stats["digests"] += 1
+        except Exception as e:
+            print(f"Error sending email digest: {e}")
+            for item in items:
+                item[-1].set_exception(e)
+            return
+        print(f"Email digest of {len(items)} alerts sent to {receiver_email}")
+        for item in items:
+            item[-1].set_result(f"Alert sent to {receiver_email} in a digest of {len(items)}.")
+
+    def close(self):
+        """Send any pending digests and close the connection."""
+        self.flush()
+        with self._lock:
+            self._disconnect()
+
+
+def _frame_attachments(frame_path, frame_bytes, timestamp, index=0):
+    if frame_bytes is not None:
+        return [(f"frame_{int(timestamp * 1000)}_{index}.jpg", frame_bytes)]
+    if frame_path and os.path.exists(frame_path):
+        with open(frame_path, "rb") as attachment:
+            return [(os.path.basename(frame_path), attachment.read())]
+    return []
+
+
+_mailer = None
+_mailer_lock = threading.Lock()
+
 
-        if frame_path and os.path.exists(frame_path):
-            with open(frame_path, "rb") as attachment:
-                part = MIMEBase("application", "octet-stream")
-                part.set_payload(attachment.read())
-                encoders.encode_base64(part)
-                part.add_header(
-                    "Content-Disposition",
-                    f"attachment; filename={os.path.basename(frame_path)}",
-                )
-                message.attach(part)
-
-        with smtplib.SMTP_SSL(smtp_host, smtp_port) as server:
-            server.login(sender_email, sender_password)
-            server.sendmail(sender_email, receiver_email, message.as_string())
-            print(f"Email sent successfully to {receiver_email}")
-            return f"Alert sent to {receiver_email}."
+def get_mailer():
+    """Process-wide Mailer configured from the environment, created on first use."""
+    global _mailer
+    with _mailer_lock:
+        if _mailer is None:
+            _mailer = Mailer()
+        return _mailer
+
+
+def send_email_alert(label, confidence_score, receiver_email, frame_path=None, raise_on_error=False):
+    """
+    Sends an email alert when a fall is detected, with an optional frame attachment.
+    The connection of the shared Mailer is reused across calls.
+    :param label: The label associated with the detected event (e.g., 'Fall Detected').
+    :param confidence_score: The confidence score of the detection.
+    :param receiver_email: The recipient email address to send the alert.
+    :param frame_path: Path to the captured frame image to attach.
+    :param raise_on_error: Re-raise failures instead of returning an error string, so callers can retry.
+    """
+    try:
+        get_mailer().send_alert(label, confidence_score, receiver_email, frame_path)
+        print(f"Email sent successfully to {receiver_email}")
+        return f"Alert sent to {receiver_email}."
 
     except Exception as e:
         print(f"Error sending email: {e}")
+        if raise_on_error:
+            raise
         return f"Error: {e}"
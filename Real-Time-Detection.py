@@ -1,22 +1,31 @@
 import cv2
-import torch
 import threading
-import multiprocessing
 import time
-from ultralytics import YOLO
 from flask import Flask, render_template, Response, request, jsonify
-from Email import send_email_alert
-# from Whatsapp import send_whatsapp_alert
-# from Message import send_sms_alert
-from icecream import ic
+from alert_queue import AlertDispatcher
+from backends import load_model
+from cameras import create_cameras, gather_batch
+from clip_recorder import ClipRecorder, FrameRingBuffer
+from event_store import EventStore
+from fall_events import FallEventTracker, fall_probability
+from inference_server import InferencePool
+from latency_budget import LatencyController, parse_sizes
+from metrics import CONTENT_TYPE, REGISTRY, RateMeter
+from motion import MotionGate
+from notifier import notifier_from_env
+from startup import StartupTimer, clear_directory_in_background, warm_up
+from status_bus import StatusBus
 import os
-import shutil
 
-model_path = "model/model.pt"
-if not os.path.exists(model_path):
-    raise FileNotFoundError(f"Model file not found at {model_path}")
+if os.getenv("FRAME_LOGGING", "1") == "0":
+    def ic(*args):
+        return None
+else:
+    from icecream import ic
 
-model = YOLO(model_path)
+model_path = "model/model.pt"
+model = None
+startup = StartupTimer()
 
 app = Flask(__name__)
 
@@ -27,94 +36,261 @@ alert_set = False
 recipient = ""
 tonumber = ""
 confidence = 1.0
+cameras = {}
+inference_rate = RateMeter()
+status_bus = StatusBus()
+event_dir = os.getenv("EVENT_DIR", "events")
+event_store = None
+clip_recorder = ClipRecorder(
+    pre_seconds=float(os.getenv("CLIP_PRE_SECONDS", 5)),
+    post_seconds=float(os.getenv("CLIP_POST_SECONDS", 5))
+)
+
+classify_pending = {}
+classify_condition = threading.Condition()
+# Input sizes only step down for PyTorch weights; exported models have a fixed input shape.
+latency_controller = LatencyController(
+    budget=float(os.getenv("LATENCY_BUDGET_MS", 200)) / 1000,
+    sizes=parse_sizes(os.getenv("INFERENCE_IMGSZ", "224,160,128"))
+    if os.getenv("INFERENCE_BACKEND", "torch") == "torch" else (None,),
+    max_stride=int(os.getenv("INFERENCE_MAX_STRIDE", 8))
+)
+
+PREDICT_SECONDS = REGISTRY.histogram("fallsafe_predict_seconds", "Time spent in one batched model.predict call.")
+PROCESS_SECONDS = REGISTRY.histogram("fallsafe_process_predictions_seconds", "Time spent in process_predictions per frame.")
+ENCODE_SECONDS = REGISTRY.histogram("fallsafe_encode_seconds", "Time spent JPEG-encoding one frame.")
+FRAMES_PROCESSED = REGISTRY.counter("fallsafe_frames_processed_total", "Frames that went through the inference loop.")
+FRAMES_CLASSIFIED = REGISTRY.counter("fallsafe_frames_classified_total", "Frames passed to the classifier.")
+FRAMES_STALE = REGISTRY.counter("fallsafe_frames_stale_total", "Frames replaced by a newer one before the classifier took them.")
+INFERENCE_ERRORS = REGISTRY.counter("fallsafe_inference_errors_total", "Batches whose classification raised, by exception type.")
+REGISTRY.gauge("fallsafe_stream_clients", "Connected MJPEG stream clients.",
+               lambda: sum(camera.broadcaster.subscribers for camera in cameras.values()))
+REGISTRY.gauge("fallsafe_inference_fps", "Frames classified per second over the last few seconds.", inference_rate.rate)
+REGISTRY.gauge("fallsafe_inference_stride", "Classify every n-th batch, set by the latency controller.",
+               lambda: latency_controller.stride)
+REGISTRY.gauge("fallsafe_inference_imgsz", "Classifier input size set by the latency controller (0 = model default).",
+               lambda: latency_controller.imgsz or 0)
+REGISTRY.gauge("fallsafe_inference_latency_seconds", "Smoothed capture-to-result latency of classified frames.",
+               lambda: latency_controller.latency or 0.0)
+REGISTRY.gauge("fallsafe_alert_queue_depth", "Alerts waiting to be sent.", lambda: alert_dispatcher.pending())
+REGISTRY.gauge("fallsafe_event_clients", "Connected Server-Sent Events clients.", lambda: status_bus.subscribers)
+notifier = notifier_from_env()
+alert_dispatcher = AlertDispatcher(
+    maxsize=int(os.getenv("ALERT_QUEUE_SIZE", 32)),
+    workers=int(os.getenv("ALERT_WORKERS", 2)),
+    max_retries=int(os.getenv("ALERT_MAX_RETRIES", 3)),
+    drop_policy=os.getenv("ALERT_DROP_POLICY", AlertDispatcher.DROP_OLDEST)
+)
 
-def process_predictions(results, frame):
+def process_predictions(results, frame, camera):
     """
-    Process the classification results. For each result, extract the top predicted class and
-    confidence using the 'probs' attribute. If a 'fall' is detected with a confidence
-    equal to or above the user-specified threshold, send an email alert.
+    Process the classification results for one camera and feed the 'fall' probability of each
+    result to the camera's event tracker.
     """
-    global fall_detected, fall_detected_time
-
     if not results:
         print("No results returned by the model.")
-        return fall_detected
+        return camera.fall_detected
 
     for r in results:
-        probs = r.probs  
-        if probs is None:
+        pred_conf = fall_probability(r)
+        if pred_conf is None:
             print("No probability scores available in the result.")
             continue
+        camera.last_fall_prob = pred_conf
+        ic(f"Camera {camera.cam_id} fall probability: {pred_conf:.2f}")
+        update_fall_state(pred_conf, camera)
 
-        class_idx = probs.top1  
-        pred_conf = probs.data[class_idx].item()  
-        class_name = r.names[class_idx]  
+    return camera.fall_detected
 
-        ic(f"Predicted Class: {class_name}, Confidence: {pred_conf:.2f}")
-        if class_name == "fall":
-            if pred_conf < confidence:
-                ic(f"Skipping prediction because confidence {pred_conf:.2f} is below threshold {confidence:.2f}")
-                continue
-            fall_detected = True
-            fall_detected_time = time.time()
+def update_fall_state(pred_conf, camera):
+    """
+    Feed one fall probability to the camera's event tracker, which smooths it over a sliding
+    window. When a new fall event opens with a smoothed confidence equal to or above the
+    user-specified threshold, a single alert is queued for the whole event right away, with
+    the newest frame of the camera's ring buffer attached, and a clip of the seconds around
+    the fall is captured in the background. Writing the media never holds up the alert.
+    """
+    global fall_detected, fall_detected_time
 
-            output_dir = "output"
-            os.makedirs(output_dir, exist_ok=True)
-            frame_path = os.path.join(output_dir, f"fall_frame_{fall_detected_time}.jpg")
-            if not cv2.imwrite(frame_path, frame):
-                print(f"Failed to save frame at {frame_path}")
+    transition, should_alert = camera.tracker.update(pred_conf, confidence)
+    with fall_detected_lock:
+        fall_detected = any(cam.fall_detected for cam in cameras.values())
+        if transition == "started":
+            fall_detected_time = camera.tracker.started_at
 
-            p_email = multiprocessing.Process(target=send_email_alert, kwargs={
-                "label": "Fall Detected!",
-                "confidence_score": pred_conf,
-                "receiver_email": recipient,
-                "frame_path": frame_path
-            })
-            p_email.start()
-            p_email.join()
+    if transition == "ended":
+        ic(f"Fall event cleared on {camera.cam_id}")
+        event_store.close_event(camera.event_id, camera.tracker.ended_at, camera.tracker.peak_confidence)
+        status_bus.publish("fall_cleared", {"status": fall_detected, "camera": camera.cam_id, **camera.tracker.status()})
+    if transition != "started":
+        return
 
-            # p_sms = multiprocessing.Process(target=send_sms_alert, args=(tonumber,))
-            # p_whatsapp = multiprocessing.Process(target=send_whatsapp_alert, args=(tonumber,))
-            # p_sms.start()
-            # p_whatsapp.start()
-            # p_sms.join()
-            # p_whatsapp.join()
+    basename = os.path.join(event_dir, f"fall_{camera.cam_id}_{camera.tracker.started_at}")
+    event_id = event_store.open_event(camera.cam_id, camera.tracker.started_at, camera.tracker.peak_confidence,
+                                      basename + ".jpg", basename + ".mp4")
+    camera.event_id = event_id
+    status_bus.publish("fall_started", {"status": fall_detected, "camera": camera.cam_id, "event_id": event_id,
+                                        **camera.tracker.status()})
 
-            ic(f"Fall detected with confidence: {pred_conf:.2f}")
+    ic(f"Fall detected on {camera.cam_id} with confidence: {camera.tracker.smoothed:.2f}")
+    if not should_alert:
+        ic(f"Alert suppressed on {camera.cam_id}, still within cooldown")
+        event_store.set_alert_status(event_id, "suppressed")
+    else:
+        latest = camera.ring.latest()
+        event_store.set_alert_status(event_id, "queued")
+        queued = alert_dispatcher.submit(
+            send_fall_alert,
+            camera.cam_id,
+            event_id,
+            label="Fall Detected!",
+            confidence_score=camera.tracker.smoothed,
+            receiver_email=recipient,
+            phone=tonumber,
+            frame_bytes=latest[1] if latest else None
+        )
+        if not queued:
+            event_store.set_alert_status(event_id, "dropped")
 
-        elif class_name == "nofall":
-            fall_detected = False
+    clip_recorder.record(camera.ring, basename,
+                         on_thumbnail=lambda frame_path: event_store.add_media(event_id, frame_path),
+                         on_clip=lambda clip_path: event_store.add_media(event_id, clip_path))
 
-    return fall_detected
+def send_fall_alert(cam_id, event_id, **alert):
+    """
+    Send the alert on every configured channel at once from a dispatcher worker, record the
+    delivery status on the event and announce the per-channel results to dashboards. Raises
+    when no channel delivered it, so the dispatcher retries.
+    """
+    summary = notifier.notify(**alert)
+    statuses = {result["status"] for result in summary.values()}
+    if "sent" in statuses:
+        status = "sent" if statuses <= {"sent", "skipped"} else "partial"
+    elif statuses & {"failed", "timeout"}:
+        status = "failed"
+    else:
+        status = "skipped"
+    event_store.set_alert_status(event_id, status)
+    status_bus.publish("alert_sent", {"camera": cam_id, "event_id": event_id, "status": status, "channels": summary})
+    if status == "failed":
+        errors = "; ".join(f"{name}: {result['error'] or result['status']}" for name, result in summary.items())
+        raise RuntimeError(f"Alert not delivered ({errors})")
 
-def generate_frames():
+def inference_loop():
     """
-    Read frames from the camera, run inference if alerts are enabled, and yield JPEG-encoded frames
-    for streaming via Flask.
+    Single producer for every viewer: each tick takes the newest frame from every camera,
+    JPEG-encodes it once and publishes it to that camera's broadcaster right away, then hands
+    the batch to the classification thread. Streaming therefore never waits on the model.
+    """
+    while any(camera.running for camera in cameras.values()):
+        batch = gather_batch(cameras)
+        if not batch:
+            time.sleep(0.005)
+            continue
+
+        for camera, frame in batch:
+            FRAMES_PROCESSED.inc(camera=camera.cam_id)
+            with ENCODE_SECONDS.time():
+                success, buffer = cv2.imencode('.jpg', frame)
+            if not success:
+                continue
+            frame_bytes = buffer.tobytes()
+            camera.broadcaster.publish(frame_bytes, frame, camera.last_frame_time)
+            camera.ring.append(frame_bytes)
+
+        if alert_set and startup.ready.is_set():
+            now = time.monotonic()
+            with classify_condition:
+                for camera, frame in batch:
+                    if camera.cam_id in classify_pending:
+                        FRAMES_STALE.inc(camera=camera.cam_id)
+                    classify_pending[camera.cam_id] = (camera, frame, now)
+                classify_condition.notify()
+
+def classify_loop():
+    """
+    Classify the newest pending frame of every camera in one batched call. Frames that were
+    replaced while the model was busy are dropped rather than queued, and the latency
+    controller sets the stride and input size that keep capture-to-result latency within
+    LATENCY_BUDGET_MS. Static cameras, as judged by their motion gate, reuse their last
+    classification. A batch that fails is counted and skipped; the loop itself never exits.
     """
-    global alert_set, confidence, cap
     while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("No frame captured from camera.")
-            break
-        
-        if alert_set:
-            results = model.predict(source=frame, conf=confidence)
-            process_predictions(results, frame)
-        success, buffer = cv2.imencode('.jpg', frame)
-        if not success:
+        with classify_condition:
+            classify_condition.wait_for(lambda: classify_pending, timeout=1.0)
+            batch = list(classify_pending.values())
+            classify_pending.clear()
+        if not batch or not latency_controller.should_run():
             continue
-        frame_bytes = buffer.tobytes()
-        yield (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+
+        to_infer = []
+        for camera, frame, _ in batch:
+            if camera.motion_gate.should_infer(frame) or camera.last_fall_prob is None:
+                to_infer.append((camera, frame))
+            else:
+                update_fall_state(camera.last_fall_prob, camera)
+        if not to_infer:
+            continue
+
+        imgsz = latency_controller.imgsz
+        try:
+            with PREDICT_SECONDS.time():
+                results = model.predict(source=[frame for _, frame in to_infer], conf=confidence, verbose=False,
+                                        **({"imgsz": imgsz} if imgsz else {}))
+            latency_controller.observe(time.monotonic() - min(enqueued for _, _, enqueued in batch))
+            FRAMES_CLASSIFIED.inc(len(to_infer))
+            inference_rate.mark(len(to_infer))
+            for (camera, frame), result in zip(to_infer, results):
+                with PROCESS_SECONDS.time():
+                    process_predictions([result], frame, camera)
+        except Exception as e:
+            INFERENCE_ERRORS.inc(error=type(e).__name__)
+            print(f"Classification failed: {e}")
+            # Back off a little so a persistent failure does not spin the loop.
+            time.sleep(0.1)
+
+def query_arg(name, type, default=None):
+    """
+    Read an optional query parameter, raising ValueError when it is present but not a valid
+    `type`; Flask's request.args.get(type=...) would silently fall back to the default instead.
+    """
+    value = request.args.get(name, '')
+    return type(value) if value != '' else default
+
+def generate_frames(camera, width=None, quality=None, fps=None):
+    """
+    Yield the latest JPEG-encoded frames of one camera for streaming via Flask, optionally
+    downscaled, recompressed and rate-limited for this viewer's tier. Each part carries the
+    frame's capture time in an X-Timestamp header so clients can measure frame age.
+    """
+    for timestamp, frame_bytes in camera.broadcaster.subscribe(width=width, quality=quality, fps=fps, with_timestamp=True):
+        yield (b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: ' + str(len(frame_bytes)).encode()
+               + b'\r\nX-Timestamp: ' + f"{timestamp:.6f}".encode() + b'\r\n\r\n' + frame_bytes + b'\r\n')
 
 @app.route('/')
 def index():
     return render_template('index.html', fall_detected=fall_detected, alert_set=alert_set)
 
 @app.route('/video_feed')
-def video_feed():
-    return Response(generate_frames(), mimetype='multipart/x-mixed-replace; boundary=frame')
+@app.route('/video_feed/<cam_id>')
+def video_feed(cam_id=None):
+    if cam_id is None:
+        cam_id = next(iter(cameras), None)
+    camera = cameras.get(cam_id)
+    if camera is None:
+        return jsonify({"message": f"Unknown camera '{cam_id}'"}), 404
+
+    # Optional viewer tier, e.g. /video_feed?w=640&q=60&fps=10
+    try:
+        width = query_arg('w', int)
+        quality = query_arg('q', int)
+        fps = query_arg('fps', float)
+    except ValueError:
+        return jsonify({"message": "Invalid stream tier"}), 400
+    width = max(64, width) if width else None
+    quality = min(max(10, quality), 95) if quality else None
+    fps = min(max(0.1, fps), 60.0) if fps else None
+    return Response(generate_frames(camera, width, quality, fps), mimetype='multipart/x-mixed-replace; boundary=frame')
 
 @app.route('/send_details', methods=['POST'])
 def send_alert():
@@ -140,14 +316,129 @@ def send_alert():
         return jsonify({"message": "Email and Phone saved successfully!"})
     return jsonify({"message": "Invalid details"}), 400
 
+def fall_status():
+    """Current overall and per-camera fall event state."""
+    return {
+        "status": fall_detected,
+        "fall_detected_time": fall_detected_time,
+        "cameras": {cam_id: camera.tracker.status() for cam_id, camera in cameras.items()}
+    }
+
 @app.route('/fall_status')
 def updateFallStatus():
-    return jsonify({"status": fall_detected})
+    return jsonify(fall_status())
+
+@app.route('/events')
+def events():
+    """
+    With "Accept: text/event-stream" (EventSource), a Server-Sent Events stream pushing
+    fall_started, fall_cleared and alert_sent events, so dashboards no longer need to poll
+    /fall_status. Otherwise a newest-first page of the event history, filtered by
+    ?since=<timestamp>&camera=<cam_id>&limit=<n> and paginated with ?before=<next_before>.
+    """
+    if request.accept_mimetypes.best == 'text/event-stream':
+        return Response(
+            status_bus.subscribe(snapshot=fall_status),
+            mimetype='text/event-stream',
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    try:
+        since = query_arg('since', float)
+        before = query_arg('before', int)
+        limit = min(max(1, query_arg('limit', int, 50)), 500)
+    except ValueError:
+        return jsonify({"message": "Invalid query parameters"}), 400
+    page = event_store.query(since=since, camera=request.args.get('camera'), limit=limit, before_id=before)
+    return jsonify({
+        "events": page,
+        "next_before": page[-1]["id"] if len(page) == limit else None
+    })
+
+@app.route('/events/<int:event_id>')
+def event_detail(event_id):
+    event = event_store.get(event_id)
+    if event is None:
+        return jsonify({"message": f"Unknown event {event_id}"}), 404
+    return jsonify(event)
+
+@app.route('/metrics')
+def metrics():
+    """Expose pipeline counters and latency histograms in the Prometheus text format."""
+    return Response(REGISTRY.render(), mimetype=CONTENT_TYPE)
+
+@app.route('/health')
+def health():
+    """
+    Readiness probe: 200 once the model is loaded and warmed up, 503 before that and whenever
+    no inference worker is able to take frames.
+    """
+    status = startup.status()
+    if isinstance(model, InferencePool):
+        status["inference_workers"] = model.status()
+        if status["status"] == "ready" and not status["inference_workers"]["ready"]:
+            status["status"] = "degraded"
+    return jsonify(status), 200 if status["status"] == "ready" else 503
+
+@app.route('/motion_stats')
+def motion_stats():
+    """Report how many frames each camera's motion gate skipped."""
+    return jsonify({cam_id: camera.motion_gate.stats() for cam_id, camera in cameras.items()})
+
+@app.route('/inference_stats')
+def inference_stats():
+    """Effective classification rate and the operating point chosen by the latency controller."""
+    return jsonify({"effective_fps": round(inference_rate.rate(), 2), **latency_controller.status()})
+
+def load_and_warm_model():
+    """
+    Load the classifier once and run a warm-up inference before declaring the server ready.
+    With INFERENCE_WORKERS > 0 the model is hosted in separate worker processes instead, each
+    loading and warming up its own copy.
+    """
+    global model
+    try:
+        workers = int(os.getenv("INFERENCE_WORKERS", 0))
+        if workers > 0:
+            with startup.step("start_inference_workers"):
+                loaded = InferencePool(model_path, workers=workers).start()
+        else:
+            with startup.step("load_model"):
+                loaded = load_model(model_path)
+            with startup.step("warm_up"):
+                warm_up(loaded)
+        model = loaded
+        startup.mark_ready()
+    except Exception as e:
+        startup.error = str(e)
+        print(f"Model startup failed: {e}")
 
 if __name__ == "__main__":
-    cap = cv2.VideoCapture(0)
-    output_dir = "output"
-    if os.path.exists(output_dir):
-        shutil.rmtree(output_dir)
-    
-    app.run(host='0.0.0.0', port=5000)
+    with startup.step("clear_output"):
+        clear_directory_in_background("output")
+    with startup.step("open_event_store"):
+        event_store = EventStore(
+            os.path.join(event_dir, "events.db"),
+            max_media_bytes=int(float(os.getenv("EVENT_MEDIA_MAX_MB", 1024)) * 1024 * 1024)
+        )
+        event_store.enforce_retention()
+    threading.Thread(target=load_and_warm_model, name="model-startup", daemon=True).start()
+
+    cameras.update(create_cameras(tracker_factory=lambda: FallEventTracker(
+        window=int(os.getenv("FALL_WINDOW", 5)),
+        open_frames=int(os.getenv("FALL_OPEN_FRAMES", 3)),
+        close_frames=int(os.getenv("FALL_CLOSE_FRAMES", 10)),
+        cooldown=float(os.getenv("ALERT_COOLDOWN", 60))
+    ), gate_factory=lambda: MotionGate(
+        threshold=float(os.getenv("MOTION_THRESHOLD", 0.01)),
+        max_skip=int(os.getenv("MOTION_MAX_SKIP", 30))
+    ), ring_factory=lambda: FrameRingBuffer(seconds=clip_recorder.pre_seconds)))
+    alert_dispatcher.start()
+    clip_recorder.start()
+
+    with startup.step("start_cameras"):
+        for camera in cameras.values():
+            camera.start()
+    threading.Thread(target=inference_loop, daemon=True).start()
+    threading.Thread(target=classify_loop, name="classifier", daemon=True).start()
+    app.run(host='0.0.0.0', port=int(os.getenv("PORT", 5000)), threaded=True)
@@ -5,17 +5,36 @@ import tkinter as tk
 from tkinter import ttk, filedialog
 import glob
 from dotenv import load_dotenv
-from moviepy.editor import VideoFileClip
-from Whatsapp import send_whatsapp_alert
-from Message import send_sms_alert
-from Email import send_email_alert
-from ultralytics import YOLO
+from Email import get_mailer
+from notifier import notifier_from_env
+from backends import load_model, model_hash
+from detection import IMAGE_EXTENSIONS, VIDEO_EXTENSIONS, frame_arrays, process_frame_results
+from detection_store import DetectionStore
+from event_output import EventOutputWriter, write_event_ranges
+from result_cache import ResultCache, detection_events, store_arrays
+from segments import iter_parallel_results, plan_segments
+from video_io import iter_sampled_frames, video_fps
+from worker_pool import create_pool
+import cv2
+import numpy as np
 from queue import Queue
-import json
-import uuid
 load_dotenv()
 
 CONFIDENCE_THRESHOLD = 0.5
+TARGET_FPS = 30
+DETECTION_FORMAT = "npz"  # or "parquet" (requires pyarrow)
+EXPORT_JSONL = False
+PROGRESS_REFRESH_MS = 200
+MODEL_PATH = "model/model.pt"
+SEGMENT_WORKERS = os.cpu_count() or 1
+SEGMENT_MIN_SECONDS = 60  # videos are split into segments of at least this length
+RESULT_CACHE_DIR = os.path.join("cache", "results")  # kept when output/ is cleared
+OUTPUT_MODE = "events"  # "events": annotated clips/thumbnails around falls only, "full": every frame, "none"
+CLIP_PRE_SECONDS = 2
+CLIP_POST_SECONDS = 2
+TIMELINE_WIDTH = 0  # e.g. 320 to also write a low-resolution overview timeline at 1 fps
+RESULT_CACHE_MAX_MB = 2048
+LOG_MAX_LINES = 500
 
 class FallDetectionApp:
     def __init__(self, root):
@@ -30,10 +49,24 @@ class FallDetectionApp:
         self.filename = "junk"
         self.fall_buffer = []
         self.fall_detected = False
-        self.model = YOLO("model/model.pt")
-        self.email_status_queue = Queue()
+        self.model = load_model(MODEL_PATH)
+        self.model_hash = model_hash(MODEL_PATH)
+        self.result_cache = ResultCache(RESULT_CACHE_DIR, RESULT_CACHE_MAX_MB * 1024 * 1024)
+        self.alert_email = None
+        self.alert_phone = None
+        self.notifier = notifier_from_env(email={"digest": True})
+        self.segment_pool = None
+        self.segment_pool_workers = 0
+        self.log_queue = Queue()
+        self.cancel_event = threading.Event()
+        self.processing_thread = None
+        self.last_alert_status = None
+        self.alert_status_lock = threading.Lock()
+        self.processed_frames = 0
+        self.expected_frames = 0
 
         self.setup_gui()
+        self.root.after(PROGRESS_REFRESH_MS, self._refresh_progress)
 
     def setup_gui(self):
         """Initialize the GUI components for user interaction."""
@@ -44,6 +77,8 @@ class FallDetectionApp:
         ttk.Button(main_frame, text="Select File", command=self.select_file).grid(row=0, column=0, padx=10, pady=10)
         self.start_button = ttk.Button(main_frame, text="Start Processing", command=self.start_processing, state=tk.DISABLED)
         self.start_button.grid(row=0, column=1, padx=10, pady=10)
+        self.cancel_button = ttk.Button(main_frame, text="Cancel", command=self.cancel_processing, state=tk.DISABLED)
+        self.cancel_button.grid(row=0, column=2, padx=10, pady=10)
 
         ttk.Label(main_frame, text="Recipient Email:").grid(row=1, column=0, padx=10, pady=5)
         self.receiver_email = ttk.Entry(main_frame, width=30)
@@ -54,10 +89,15 @@ class FallDetectionApp:
         self.receiver_phone.grid(row=2, column=1, padx=10, pady=5)
 
         self.output_text = tk.Text(main_frame, height=20, width=70)
-        self.output_text.grid(row=3, column=0, columnspan=2, padx=10, pady=10)
+        self.output_text.grid(row=3, column=0, columnspan=3, padx=10, pady=10)
+
+        self.progress_bar = ttk.Progressbar(main_frame, mode="determinate", length=400)
+        self.progress_bar.grid(row=4, column=0, columnspan=2, padx=10, pady=5, sticky="ew")
+        self.progress_label = ttk.Label(main_frame, text="")
+        self.progress_label.grid(row=4, column=2, padx=10, pady=5)
 
         self.fall_status_label = ttk.Label(main_frame, text="Select a file to start", style="Select.TLabel")
-        self.fall_status_label.grid(row=4, column=0, columnspan=2, padx=10, pady=10)
+        self.fall_status_label.grid(row=5, column=0, columnspan=3, padx=10, pady=10)
 
         style = ttk.Style()
         style.configure("FallDetected.TLabel", foreground="red")
@@ -92,10 +132,10 @@ class FallDetectionApp:
         if self.selected_file:
             self.output_text.delete(1.0, tk.END)
             self.output_text.insert(tk.END, f"Selected file: {self.selected_file}\n")
-            if self.selected_file.lower().endswith(('.jpg', '.png', '.jpeg', '.bmp', '.dng', '.mpo', '.tif', '.tiff', '.webp', '.pfm', '.heic')): 
+            if self.selected_file.lower().endswith(IMAGE_EXTENSIONS):
                 self.isImage = True
                 self.isVideo = False
-            elif self.selected_file.lower().endswith(('.asf', '.avi', '.gif', '.m4v', '.mkv', '.mov', '.mp4', '.mpeg', '.mpg', '.ts', '.wmv', '.webm')):
+            elif self.selected_file.lower().endswith(VIDEO_EXTENSIONS):
                 self.isVideo = True
                 self.isImage = False
             else:
@@ -117,14 +157,46 @@ class FallDetectionApp:
         return re.match(email_regex, email) is not None
 
     def update_gui(self, message):
-        """Display message in GUI output text area."""
-        self.root.after(0, self._update_text, message)
-
-    def _update_text(self, message):
-        """Actually update the text in the text widget."""
-        self.output_text.insert(tk.END, message + '\n')
+        """Queue a message for the GUI output text area; it is shown on the next refresh tick."""
+        self.log_queue.put(message)
+
+    def _update_text(self, messages):
+        """Append messages to the text widget, keeping only the last LOG_MAX_LINES lines."""
+        self.output_text.insert(tk.END, '\n'.join(messages) + '\n')
+        line_count = int(self.output_text.index('end-1c').split('.')[0])
+        if line_count > LOG_MAX_LINES:
+            self.output_text.delete('1.0', f'{line_count - LOG_MAX_LINES}.0')
         self.output_text.see(tk.END)
 
+    def _refresh_progress(self):
+        """Periodic tick: drain queued log lines in one batch and redraw the progress bar."""
+        messages = []
+        while not self.log_queue.empty() and len(messages) < LOG_MAX_LINES:
+            messages.append(self.log_queue.get_nowait())
+        if messages:
+            self._update_text(messages)
+
+        if self.expected_frames:
+            self.progress_bar.config(maximum=self.expected_frames, value=min(self.processed_frames, self.expected_frames))
+            self.progress_label.config(text=f"{self.processed_frames}/{self.expected_frames} frames")
+        self.root.after(PROGRESS_REFRESH_MS, self._refresh_progress)
+
+    def expected_frame_count(self, video_path):
+        """Estimate how many frames will be classified, for the determinate progress bar."""
+        if not self.isVideo:
+            return 1
+        cap = cv2.VideoCapture(video_path)
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        source_fps = video_fps(cap)
+        cap.release()
+        return max(1, int(total * min(1.0, TARGET_FPS / source_fps)))
+
+    def cancel_processing(self):
+        """Ask the worker thread to stop after the current frame."""
+        self.cancel_event.set()
+        self.cancel_button.config(state=tk.DISABLED)
+        self.update_gui("Cancelling...")
+
     def start_processing(self):
         """Begin processing the selected file and manage GUI updates."""
         files = glob.glob(os.path.join(self.save_dir , '*'))
@@ -135,50 +207,33 @@ class FallDetectionApp:
             except Exception as e:
                 print(f"Error deleting {file}: {e}")
 
-        email = self.receiver_email.get()
+        email = self.receiver_email.get().strip()
         if not email or not self.validate_email(email):
             self.update_gui("Error: Please enter a valid recipient email before starting processing.")
             return
+        # Read on the GUI thread; the worker thread must not touch Tk widgets
+        self.alert_email = email
+        self.alert_phone = self.receiver_phone.get().strip() or None
         
         self.fall_status_label.config(text="Processing.....", style="Processing.TLabel")
         self.start_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.cancel_event.clear()
+        self.fall_detected = False
+        self.last_alert_status = None
+        self.processed_frames = 0
+        self.expected_frames = self.expected_frame_count(self.selected_file)
+        self.progress_bar.config(maximum=self.expected_frames, value=0)
         self.update_gui("Processing started...")
 
         self.filename = self.get_filename()
         
-        # Process differently based on file type
-        if self.isVideo:
-            threading.Thread(target=self.convert_video_to_lowerfps, daemon=True).start()
-        else:  # Image processing
-            threading.Thread(target=lambda: self.process_video(self.selected_file), daemon=True).start()
-
-    def convert_video_to_lowerfps(self):
-        """Convert video to 30 FPS and save it using moviepy2."""
-        try:
-            input_video = self.selected_file
-            output_video = os.path.join(self.save_dir, f"converted_{self.filename}.mp4")
-            
-            self.root.after(0, lambda: self.update_gui("Starting video conversion..."))
-            clip = VideoFileClip(input_video)
-            clip = clip.set_fps(30)
-            clip.write_videofile(output_video, codec='libx264', audio_codec='aac', threads=4)
-            clip.close()
-
-            self.root.after(0, lambda: self.update_gui("Video converted successfully. Starting processing..."))
-            
-            # Process the converted video
-            self.process_video(output_video)
-
-        except Exception as e:
-            self.root.after(0, lambda: self.update_gui(f"Error in conversion: {str(e)}"))
-            self.root.after(0, lambda: self.fall_status_label.config(
-                text="Conversion Failed", 
-                style="FallDetected.TLabel"
-            ))
-            self.root.after(0, lambda: self.start_button.config(state=tk.NORMAL))
+        # Videos are decoded and sampled on the fly, images go straight to the model
+        self.processing_thread = threading.Thread(target=lambda: self.process_video(self.selected_file), daemon=True)
+        self.processing_thread.start()
 
     def process_video(self, video_path):
-        """Process video using YOLO model with JSON output"""
+        """Process video using YOLO model, storing detections in a chunked columnar store"""
         try:
             self.update_gui(f"Loading model and starting prediction...")
             
@@ -192,52 +247,110 @@ class FallDetectionApp:
                 raise ValueError("YOLO model not properly initialized")
             self.update_gui("Model verified")
 
+            fall_ids = [idx for idx, name in self.model.names.items() if name == "fall"]
+            store_path = os.path.join(self.save_dir, f"{self.filename}_detections")
+            if DETECTION_FORMAT == "parquet":
+                store_path += ".parquet"
+            jsonl_path = os.path.join(self.save_dir, f"{self.filename}_detections.jsonl") if EXPORT_JSONL else None
+
+            # The same file analysed with the same model and sampling is served from the cache
+            settings = {"target_fps": TARGET_FPS if self.isVideo else None, "backend": os.getenv("INFERENCE_BACKEND") or "torch"}
+            cache_key = self.result_cache.key(video_path, self.model_hash, settings)
+            cached = self.result_cache.get(cache_key, CONFIDENCE_THRESHOLD)
+            if cached is not None:
+                return self.report_cached(cached, video_path, fall_ids, store_path, jsonl_path)
+
             # Start prediction with detailed logging
             self.update_gui("Starting YOLO prediction...")
-            results = self.model.predict(
-                source=video_path,
-                conf=CONFIDENCE_THRESHOLD,
-                save=True,
-                project=self.save_dir,
-                name="output",
-                stream=True,
-                verbose=True  # Add verbose output
-            )
+            segments = plan_segments(video_path, SEGMENT_WORKERS, SEGMENT_MIN_SECONDS) if self.isVideo and SEGMENT_WORKERS > 1 else []
+            segmented = len(segments) > 1
+            if segmented:
+                results = self.predict_video_segments(video_path, segments)
+            elif self.isVideo:
+                results = self.predict_video_stream(video_path)
+            else:
+                results = self.model.predict(
+                    source=video_path,
+                    conf=CONFIDENCE_THRESHOLD,
+                    save=OUTPUT_MODE == "full",
+                    project=self.save_dir,
+                    name="output",
+                    stream=True,
+                    verbose=True  # Add verbose output
+                )
             self.update_gui("YOLO prediction initialized")
+            # Videos yield (frame_index, xywh, class_ids, confidences, frame) already, an image is frame 0
+            records = results if self.isVideo else ((0, *frame_arrays(result), result.orig_img) for result in results)
 
             self.update_gui("Starting frame processing...")
-            all_predictions = []
             frame_count = 0
-            
-            # Process each frame with logging
-            for result in results:
-                frame_count += 1
-                self.update_gui(f"Processing frame {frame_count}")
-                
-                frame_predictions = self.process_frame_results(result)
-                if frame_predictions:
-                    all_predictions.extend(frame_predictions)
-                    output = {"predictions": frame_predictions}
-                    self.update_gui(f"Frame {frame_count} detections: {json.dumps(output, indent=2)}")
-                    
-                    # Check for falls and send alerts
-                    for pred in frame_predictions:
-                        if pred["class"] == "fall" and pred["confidence"] > CONFIDENCE_THRESHOLD:
-                            self.fall_detected = True
-                            self.update_gui(f"Fall detected in frame {frame_count} with confidence {pred['confidence']}")
-                            self.send_alerts("fall", pred["confidence"])
+            # Segment workers return no decoded frames; their event clips are rendered after the merge
+            event_output = self.event_writer(video_path, fall_ids, timeline=not segmented) if OUTPUT_MODE == "events" else None
+
+            # Process each frame; only event-level lines go to the log, progress goes to the bar
+            in_fall = False
+            cancelled = False
+            with DetectionStore(store_path, self.model.names, fmt=DETECTION_FORMAT, jsonl_path=jsonl_path) as store:
+                for frame_index, xywh, class_ids, confidences, frame in records:
+                    if self.cancel_event.is_set():
+                        cancelled = True
+                        break
+                    store.append(frame_index, xywh, class_ids, confidences)
+                    if event_output is not None and not segmented:
+                        event_output.add(frame_count, frame, xywh, class_ids, confidences)
+                    frame_count += 1
+                    self.processed_frames = frame_count
 
+                    # Check for falls and send alerts
+                    # One alert per fall, sent with the frame where it starts
+                    fall_mask = np.isin(class_ids, fall_ids) & (confidences > CONFIDENCE_THRESHOLD)
+                    if fall_mask.any() and not in_fall:
+                        self.update_gui(f"Fall detected in frame {frame_index} with confidence {confidences[fall_mask].max():.2f}")
+                        self.fall_detected = True
+                        self.send_alerts("fall", float(confidences[fall_mask].max()), frame)
+                    elif in_fall and not fall_mask.any():
+                        self.update_gui(f"Fall cleared at frame {frame_index}")
+                    in_fall = bool(fall_mask.any())
+            records.close()
+            if hasattr(results, "close"):
+                results.close()
+            # Segmented runs stop yielding as soon as Cancel is pressed, before the loop sees it
+            cancelled = cancelled or self.cancel_event.is_set()
+            get_mailer().flush()
+            self.update_gui(f"Stored {store.count} detections in {store_path}")
             self.update_gui(f"Processed total of {frame_count} frames")
-            self.update_gui("Video processing completed")
-            
+
+            if not cancelled and frame_count:
+                # Read the finished store back chunk by chunk instead of keeping every frame's arrays
+                arrays = store_arrays(store_path)
+                events = detection_events(arrays["frame"], arrays["class_id"], arrays["confidence"],
+                                          fall_ids, CONFIDENCE_THRESHOLD)
+                self.result_cache.put(cache_key, **arrays, meta={
+                    "file": os.path.basename(video_path),
+                    "frames": frame_count,
+                    "inference_conf": CONFIDENCE_THRESHOLD,
+                    "threshold": CONFIDENCE_THRESHOLD,
+                    "events": events,
+                })
+                if event_output is not None and segmented:
+                    self.render_event_ranges(event_output, video_path, arrays, events)
+            if event_output is not None:
+                self.finish_event_output(event_output)
+
             # Update GUI status
-            final_status = "Processing Complete - Falls Detected" if self.fall_detected else "Processing Complete - No Falls Detected"
-            final_style = "FallDetected.TLabel" if self.fall_detected else "NoFallDetected.TLabel"
-            
+            if cancelled:
+                self.update_gui("Video processing cancelled")
+                final_status, final_style = "Processing Cancelled", "Select.TLabel"
+            else:
+                self.update_gui("Video processing completed")
+                final_status = "Processing Complete - Falls Detected" if self.fall_detected else "Processing Complete - No Falls Detected"
+                final_style = "FallDetected.TLabel" if self.fall_detected else "NoFallDetected.TLabel"
+
             self.root.after(0, lambda: self.fall_status_label.config(text=final_status, style=final_style))
             self.root.after(0, lambda: self.start_button.config(state=tk.NORMAL))
+            self.root.after(0, lambda: self.cancel_button.config(state=tk.DISABLED))
             
-            return {"predictions": all_predictions}
+            return {"detections": store.count, "store": store_path}
 
         except Exception as e:
             import traceback
@@ -246,64 +359,205 @@ class FallDetectionApp:
             self.update_gui(f"Error details:\n{error_details}")
             self.root.after(0, lambda: self.fall_status_label.config(text="Processing Failed", style="FallDetected.TLabel"))
             self.root.after(0, lambda: self.start_button.config(state=tk.NORMAL))
+            self.root.after(0, lambda: self.cancel_button.config(state=tk.DISABLED))
             return {"predictions": [], "error": str(e)}
 
-    def process_frame_results(self, result):
-        """Process single frame results into structured JSON format"""
-        predictions = []
-        
-        if not hasattr(result, 'boxes'):
-            return predictions
-
-        for box in result.boxes:
-            x, y, w, h = box.xywh[0].tolist()
-            conf = box.conf[0].item()
-            cls = box.cls[0].item()
-            class_name = result.names[int(cls)]
-
-            prediction = {
-                "x": float(x),
-                "y": float(y),
-                "width": float(w),
-                "height": float(h),
-                "class": class_name,
-                "confidence": float(conf),
-                "detection_id": str(uuid.uuid4())
-            }
-            
-            predictions.append(prediction)
-
-        return predictions
-
-    def send_alerts(self, label, confidence_score):
-        """Send alerts with proper thread handling"""
-        email_thread = threading.Thread(
-            target=lambda q: q.put(send_email_alert(label, confidence_score)),
-            args=(self.email_status_queue,),
-            daemon=True
+    def sampled_fps(self, video_path):
+        """Frame rate of the analysed frames: the video's own rate capped at TARGET_FPS."""
+        if not self.isVideo:
+            return 1.0
+        cap = cv2.VideoCapture(video_path)
+        source_fps = video_fps(cap)
+        cap.release()
+        return min(source_fps, TARGET_FPS)
+
+    def predict_video_stream(self, video_path):
+        """
+        Decode the video directly, sample it at TARGET_FPS while decoding and yield
+        (frame_index, xywh, class_ids, confidences, frame) for every sampled frame as soon as it
+        is classified, frame_index being the frame's index in the source video. Only with
+        OUTPUT_MODE "full" is every frame annotated and written to output/output/; otherwise
+        annotated output is limited to the fall events (see EventOutputWriter).
+        """
+        output_fps = self.sampled_fps(video_path)
+        annotated_path = os.path.join(self.save_dir, "output", f"{self.filename}.mp4")
+        if OUTPUT_MODE == "full":
+            os.makedirs(os.path.dirname(annotated_path), exist_ok=True)
+        writer = None
+        try:
+            for frame_index, timestamp, frame in iter_sampled_frames(video_path, TARGET_FPS):
+                result = self.model.predict(source=frame, conf=CONFIDENCE_THRESHOLD, verbose=False)[0]
+                if OUTPUT_MODE == "full":
+                    annotated = result.plot()
+                    if writer is None:
+                        height, width = annotated.shape[:2]
+                        writer = cv2.VideoWriter(annotated_path, cv2.VideoWriter_fourcc(*"mp4v"), output_fps, (width, height))
+                    writer.write(annotated)
+                yield (frame_index, *frame_arrays(result), frame)
+        finally:
+            if writer is not None:
+                writer.release()
+
+    def event_writer(self, video_path, fall_ids, timeline=True):
+        """EventOutputWriter for the current file; the timeline needs every analysed frame in order."""
+        return EventOutputWriter(
+            os.path.join(self.save_dir, "output"), self.filename, self.sampled_fps(video_path),
+            self.model.names, fall_ids, CONFIDENCE_THRESHOLD, CLIP_PRE_SECONDS, CLIP_POST_SECONDS,
+            timeline_width=TIMELINE_WIDTH if timeline else 0, write_clips=self.isVideo
         )
-        email_thread.start()
-
-        # threading.Thread(
-        #     target=lambda: send_sms_alert(label, confidence_score),
-        #     daemon=True
-        # ).start()
-        
-        # threading.Thread(
-        #     target=lambda: send_whatsapp_alert(label, confidence_score),
-        #     daemon=True
-        # ).start()
-
-        if not self.email_status_queue.empty():
-            email_status = self.email_status_queue.get()
-            self.update_gui(f"Email alert status: {email_status}")
 
+    def render_event_ranges(self, event_output, video_path, arrays, events):
+        """
+        Write the annotated event output of a run whose frames were not kept (parallel segments,
+        cached results) by decoding only the frames around each fall event once more.
+        """
+        if not events:
+            return
+        if not self.isVideo:
+            event_output.add(0, cv2.imread(video_path), arrays["xywh"], arrays["class_id"], arrays["confidence"])
+            return
+        decoded = write_event_ranges(event_output, video_path, TARGET_FPS, arrays["frame"], arrays["xywh"],
+                                     arrays["class_id"], arrays["confidence"], events, CLIP_PRE_SECONDS,
+                                     CLIP_POST_SECONDS)
+        self.update_gui(f"Decoded {decoded} frames around {len(events)} fall events for the event clips")
+
+    def finish_event_output(self, event_output):
+        written = event_output.close()
+        self.update_gui(f"Wrote {len(written['clips'])} event clips and {len(written['thumbnails'])} thumbnails"
+                        f" to {event_output.directory}")
+        if written["timeline"]:
+            self.update_gui(f"Wrote overview timeline to {written['timeline']}")
+
+    def report_cached(self, cached, video_path, fall_ids, store_path, jsonl_path):
+        """
+        Finish an analysis from the result cache without running the model. When only the
+        threshold changed since the cached run, just the fall events that differ are logged.
+        Event clips and thumbnails are rendered again from the frames around each event.
+        """
+        events = cached.events(fall_ids, CONFIDENCE_THRESHOLD)
+        previous_threshold = cached.meta["threshold"]
+        self.update_gui(f"Loaded cached results for {cached.frames} frames")
+        if previous_threshold != CONFIDENCE_THRESHOLD:
+            previous = {(event["start_frame"], event["end_frame"]) for event in cached.meta["events"]}
+            current = {(event["start_frame"], event["end_frame"]) for event in events}
+            added = [event for event in events if (event["start_frame"], event["end_frame"]) not in previous]
+            removed = [event for event in cached.meta["events"] if (event["start_frame"], event["end_frame"]) not in current]
+            self.update_gui(f"Threshold changed from {previous_threshold} to {CONFIDENCE_THRESHOLD}: "
+                            f"{len(added)} new and {len(removed)} dropped fall events")
+            for sign, changed in (("+", added), ("-", removed)):
+                for event in changed:
+                    self.update_gui(f"{sign} fall in frames {event['start_frame']}-{event['end_frame']} "
+                                    f"with confidence {event['peak_confidence']:.2f}")
+            self.result_cache.update_meta(cached, threshold=CONFIDENCE_THRESHOLD, events=events)
+        else:
+            self.update_gui(f"{len(events)} fall events, unchanged since the cached analysis")
+
+        with DetectionStore(store_path, self.model.names, fmt=DETECTION_FORMAT, jsonl_path=jsonl_path) as store:
+            for frame_index, xywh, class_ids, confidences in cached.iter_frames():
+                store.append(frame_index, xywh, class_ids, confidences)
+        self.update_gui(f"Stored {store.count} detections in {store_path}")
+        if OUTPUT_MODE == "events":
+            event_output = self.event_writer(video_path, fall_ids, timeline=False)
+            self.render_event_ranges(event_output, video_path, cached.arrays, events)
+            self.finish_event_output(event_output)
+        elif OUTPUT_MODE == "full":
+            self.update_gui("Full annotated output is not produced from cached results; "
+                            "clear the result cache to render it again")
+
+        self.processed_frames = self.expected_frames = cached.frames
+        self.fall_detected = bool(events)
+        final_status = "Processing Complete - Falls Detected" if self.fall_detected else "Processing Complete - No Falls Detected"
+        final_style = "FallDetected.TLabel" if self.fall_detected else "NoFallDetected.TLabel"
+        self.root.after(0, lambda: self.fall_status_label.config(text=final_status, style=final_style))
+        self.root.after(0, lambda: self.start_button.config(state=tk.NORMAL))
+        self.root.after(0, lambda: self.cancel_button.config(state=tk.DISABLED))
+        return {"detections": store.count, "store": store_path, "cached": True}
+
+    def predict_video_segments(self, video_path, segments):
+        """
+        Classify a long video on up to SEGMENT_WORKERS processes, one keyframe-aligned segment
+        at a time per worker, and yield (frame_index, xywh, class_ids, confidences, frame) in frame
+        order. Fall events spanning two segments come out as one, since frames are merged back
+        in order. `frame` is the JPEG thumbnail of the first frame of a segment's fall event,
+        used for alerts, None otherwise; the annotated event output is rendered after the merge.
+        Cancel stops the segments already running on the workers too.
+        """
+        workers = min(SEGMENT_WORKERS, len(segments))
+        self.update_gui(f"Splitting video into {len(segments)} segments for {workers} worker processes")
+        pool = self.get_segment_pool(workers)
+        for frame_index, _, xywh, class_ids, confidences, thumbnail in iter_parallel_results(
+                pool, video_path, segments, CONFIDENCE_THRESHOLD, TARGET_FPS, cancel=self.cancel_event):
+            yield frame_index, xywh, class_ids, confidences, thumbnail
+
+    def get_segment_pool(self, workers):
+        """
+        Worker pool for segmented runs, kept between runs so the workers load the model only
+        once. Each worker's thread count depends on the pool size, so a run that needs a
+        different number of workers gets a new pool.
+        """
+        if self.segment_pool is not None and self.segment_pool_workers != workers:
+            self.segment_pool.shutdown(wait=False, cancel_futures=True)
+            self.segment_pool = None
+        if self.segment_pool is None:
+            self.segment_pool = create_pool(MODEL_PATH, workers=workers)
+            self.segment_pool_workers = workers
+        return self.segment_pool
+
+    def close(self):
+        """Stop the segment workers and the notifier and send pending email digests when the window closes."""
+        # A run in progress stops after its current frame; segments running on the workers too
+        self.cancel_event.set()
+        if self.processing_thread is not None:
+            self.processing_thread.join(timeout=5)
+        if self.segment_pool is not None:
+            self.segment_pool.shutdown(wait=False, cancel_futures=True)
+            self.segment_pool = None
+        # Alerts still in flight add to the email digest, which is only sent when its timer fires
+        self.notifier.close(wait=True)
+        get_mailer().close()
+
+    def process_frame_results(self, result, frame_index=0):
+        """Process single frame results into structured JSON format"""
+        return process_frame_results(result, frame_index)
+
+    def send_alerts(self, label, confidence_score, frame=None):
+        """
+        Send the alert on every configured channel in the background. Email alerts are batched
+        into a digest with the frames attached and SMS/WhatsApp are rate limited, so a burst of
+        falls costs a handful of messages instead of one connection per fall.
+        """
+        frame_bytes = frame if isinstance(frame, bytes) else None
+        if frame is not None and frame_bytes is None:
+            success, buffer = cv2.imencode(".jpg", frame)
+            frame_bytes = buffer.tobytes() if success else None
+        future = self.notifier.notify_async(
+            label=label,
+            confidence_score=confidence_score,
+            receiver_email=self.alert_email,
+            phone=self.alert_phone,
+            frame_bytes=frame_bytes
+        )
+        future.add_done_callback(lambda f: self.log_alert_status(
+            f"Error: {f.exception()}" if f.exception() else
+            ", ".join(f"{name} {result['status']}" for name, result in f.result().items())
+        ))
+
+    def log_alert_status(self, status):
+        """Log how an alert was delivered; consecutive alerts mostly end the same way, so only changes are logged."""
+        with self.alert_status_lock:
+            if status == self.last_alert_status:
+                return
+            self.last_alert_status = status
+        self.update_gui(f"Alert status: {status}")
 
 def run():
     """Run the Fall Detection application."""
     root = tk.Tk()
     app = FallDetectionApp(root)
-    root.mainloop()
+    try:
+        root.mainloop()
+    finally:
+        app.close()
 
 if __name__ == "__main__":
     run()
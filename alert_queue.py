@@ -0,0 +1,118 @@
+import queue
+import threading
+import time
+from metrics import REGISTRY
+
+ALERTS = REGISTRY.counter("fallsafe_alerts_total", "Alerts by outcome (queued, sent, failed, retried, dropped).")
+ALERT_SEND_SECONDS = REGISTRY.histogram("fallsafe_alert_send_seconds", "Time spent delivering one alert attempt.")
+
+
+class AlertDispatcher:
+    """
+    Bounded in-process queue of pending alerts drained by dedicated worker threads, so the
+    video/inference loop never waits on a mail server. Failed sends are retried with
+    exponential backoff; when the queue is full the drop policy decides which alert is lost.
+    """
+
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+
+    def __init__(self, maxsize=32, workers=2, max_retries=3, backoff=1.0, max_backoff=30.0,
+                 drop_policy=DROP_OLDEST):
+        if drop_policy not in (self.DROP_OLDEST, self.DROP_NEWEST):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._workers = workers
+        self._threads = []
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.drop_policy = drop_policy
+        self._stats_lock = threading.Lock()
+        self.stats = {"queued": 0, "sent": 0, "failed": 0, "retried": 0, "dropped": 0}
+
+    def start(self):
+        """Start the worker threads."""
+        for index in range(self._workers):
+            thread = threading.Thread(target=self._worker, name=f"alert-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout=None):
+        """Let the workers finish the alerts already queued, then stop them."""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+        ALERTS.inc(status=key)
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Queue an alert without blocking the caller.
+        :param func: Callable that sends the alert and raises on failure.
+        :return: True if the alert was queued, False if it was dropped.
+        """
+        item = (func, args, kwargs)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            if self.drop_policy == self.DROP_NEWEST:
+                self._count("dropped")
+                print("Alert queue full, dropping new alert.")
+                return False
+            try:
+                self._queue.get_nowait()
+                self._queue.task_done()
+                self._count("dropped")
+                print("Alert queue full, dropping oldest alert.")
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                self._count("dropped")
+                return False
+        self._count("queued")
+        return True
+
+    def pending(self):
+        """Number of alerts waiting to be sent."""
+        return self._queue.qsize()
+
+    def join(self):
+        """Block until every queued alert has been processed."""
+        self._queue.join()
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._deliver(*item)
+            finally:
+                self._queue.task_done()
+
+    def _deliver(self, func, args, kwargs):
+        delay = self.backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                with ALERT_SEND_SECONDS.time():
+                    func(*args, **kwargs)
+                self._count("sent")
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    print(f"Alert failed after {attempt + 1} attempts: {e}")
+                    self._count("failed")
+                    return
+                print(f"Alert attempt {attempt + 1} failed: {e}. Retrying in {delay:.1f}s")
+                self._count("retried")
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
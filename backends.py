@@ -0,0 +1,195 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+BACKENDS = ("torch", "onnx", "openvino", "onnx-int8")
+DEFAULT_MODEL_PATH = "model/model.pt"
+EXPORT_ROOT = os.path.join("model", "exports")
+
+
+def model_hash(model_path, chunk_size=1 << 20):
+    """Return a short SHA-256 digest of the weights file, used to key cached exports."""
+    digest = hashlib.sha256()
+    with open(model_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def export_path(model_path, backend):
+    """Location of the cached export of `model_path` for `backend`."""
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    cache_dir = os.path.join(EXPORT_ROOT, model_hash(model_path))
+    if backend == "onnx":
+        return os.path.join(cache_dir, f"{stem}.onnx")
+    if backend == "onnx-int8":
+        return os.path.join(cache_dir, f"{stem}_int8.onnx")
+    if backend == "openvino":
+        return os.path.join(cache_dir, f"{stem}_openvino_model")
+    raise ValueError(f"Unknown inference backend: {backend}")
+
+
+def _quantize_onnx(onnx_path, int8_path):
+    """Dynamically quantize the ONNX weights to INT8, keeping the ultralytics metadata (class names)."""
+    import onnx
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QInt8)
+    source, quantized = onnx.load(onnx_path), onnx.load(int8_path)
+    del quantized.metadata_props[:]
+    quantized.metadata_props.extend(source.metadata_props)
+    onnx.save(quantized, int8_path)
+
+
+def _publish(source, target):
+    """Move a finished export into the cache in one step; a copy published first by another process wins."""
+    try:
+        os.replace(source, target)
+    except OSError:
+        # Only a non-empty directory cannot be replaced; the other copy was built from the same weights.
+        if not os.path.isdir(target):
+            raise
+
+
+def export_model(model_path, backend):
+    """
+    Export the PyTorch weights for `backend` and move the result into the export cache.
+    Several processes may export the same model at once, so each one exports from its own
+    copy of the weights in a scratch directory and publishes the result with os.replace.
+    :return: Path of the cached export.
+    """
+    from ultralytics import YOLO
+
+    target = export_path(model_path, backend)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    scratch = tempfile.mkdtemp(prefix=".export-", dir=os.path.dirname(target))
+    try:
+        if backend == "onnx-int8":
+            onnx_path = export_path(model_path, "onnx")
+            if not os.path.exists(onnx_path):
+                export_model(model_path, "onnx")
+            quantized = os.path.join(scratch, os.path.basename(target))
+            _quantize_onnx(onnx_path, quantized)
+            _publish(quantized, target)
+            return target
+
+        fmt = "onnx" if backend == "onnx" else "openvino"
+        weights = os.path.join(scratch, os.path.basename(model_path))
+        shutil.copy2(model_path, weights)
+        exported = YOLO(weights).export(format=fmt)
+        _publish(str(exported), target)
+        return target
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def ensure_export(model_path=DEFAULT_MODEL_PATH, backend=None):
+    """
+    Make sure the cached export for `backend` exists. Pools call this before spawning their
+    workers so the export runs once in the parent instead of once per worker.
+    :return: Path to load the model from.
+    """
+    backend = backend or os.getenv("INFERENCE_BACKEND", "torch")
+    if backend == "torch":
+        return model_path
+    target = export_path(model_path, backend)
+    if not os.path.exists(target):
+        print(f"No cached {backend} export found, exporting {model_path}...")
+        target = export_model(model_path, backend)
+    return target
+
+
+def load_model(model_path=DEFAULT_MODEL_PATH, backend=None):
+    """
+    Load the classifier for the requested CPU backend. Non-PyTorch backends are exported once,
+    cached under model/exports/<weights hash>/ and loaded from the cache on later starts.
+    :param model_path: Path to the PyTorch weights.
+    :param backend: One of BACKENDS, defaults to the INFERENCE_BACKEND environment variable.
+    """
+    from ultralytics import YOLO
+
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model file not found at {model_path}")
+
+    backend = backend or os.getenv("INFERENCE_BACKEND", "torch")
+    if backend == "torch":
+        return YOLO(model_path)
+    return YOLO(ensure_export(model_path, backend), task="classify")
+
+
+def _sample_frames(video_path, every=5, limit=200):
+    import cv2
+
+    cap = cv2.VideoCapture(video_path)
+    frames, index = [], 0
+    while len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if index % every == 0:
+            frames.append(frame)
+        index += 1
+    cap.release()
+    return frames
+
+
+def compare_backends(model_path, videos, backends=BACKENDS):
+    """
+    Run every backend over frames sampled from `videos` and report the mean latency per frame
+    and how often its top-1 decision agrees with the PyTorch reference.
+    """
+    frames = [frame for video in videos for frame in _sample_frames(video)]
+    if not frames:
+        raise ValueError("No frames could be read from the given videos.")
+
+    report, reference = {}, None
+    for backend in backends:
+        try:
+            model = load_model(model_path, backend)
+        except Exception as e:
+            report[backend] = {"error": str(e)}
+            continue
+
+        model.predict(source=frames[0], verbose=False)
+        decisions, latencies = [], []
+        for frame in frames:
+            started = time.perf_counter()
+            result = model.predict(source=frame, verbose=False)[0]
+            latencies.append(time.perf_counter() - started)
+            decisions.append(result.names[result.probs.top1])
+
+        if reference is None:
+            reference = decisions
+        agreement = sum(a == b for a, b in zip(decisions, reference)) / len(frames)
+        report[backend] = {
+            "frames": len(frames),
+            "mean_ms": 1000 * sum(latencies) / len(latencies),
+            "fps": len(latencies) / sum(latencies),
+            "agreement": agreement,
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and compare CPU inference backends.")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--export", choices=[b for b in BACKENDS if b != "torch"],
+                        help="Export a single backend into the cache and exit.")
+    parser.add_argument("--videos", nargs="+", default=["TestFiles/test.mp4", "TestFiles/new_test.mp4"])
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    args = parser.parse_args()
+
+    if args.export:
+        print(export_model(args.model, args.export))
+        return
+
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+    print(json.dumps(compare_backends(args.model, args.videos, backends), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import as_completed
+
+from detection import IMAGE_EXTENSIONS, VIDEO_EXTENSIONS, fall_predictions, iter_file_results, process_frame_results
+from worker_pool import create_pool, worker_model
+
+# Not under output/: both apps clear that directory, which would throw away finished results
+DEFAULT_OUTPUT_DIR = "batch_results"
+
+
+def collect_inputs(patterns):
+    """Expand directories and glob patterns into a sorted list of image/video files."""
+    extensions = IMAGE_EXTENSIONS + VIDEO_EXTENSIONS
+    files = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, names in os.walk(pattern):
+                files.update(os.path.join(root, name) for name in names if name.lower().endswith(extensions))
+        else:
+            files.update(path for path in glob.glob(pattern, recursive=True) if path.lower().endswith(extensions))
+    return sorted(files)
+
+
+def result_path(output_dir, input_path):
+    """JSONL result file for `input_path`; the path hash keeps same-named clips apart."""
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+    digest = hashlib.sha1(os.path.abspath(input_path).encode()).hexdigest()[:8]
+    return os.path.join(output_dir, f"{stem}-{digest}.jsonl")
+
+
+def read_summary(path):
+    """Return the summary record stored on the last line of a finished result file."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        f.seek(max(0, position - 4096))
+        last_line = f.read().splitlines()[-1]
+    return json.loads(last_line)["summary"]
+
+
+def process_file(input_path, output_path, conf, target_fps):
+    """
+    Classify one file and stream one JSON line per frame into `output_path`, followed by a
+    summary line. Results are written to a .partial file and renamed when complete, so an
+    interrupted run never leaves a file that looks finished.
+    """
+    started = time.time()
+    partial_path = output_path + ".partial"
+    frames = falls = 0
+    peak = 0.0
+    first_fall = None
+    with open(partial_path, "w") as out:
+        for frame_index, timestamp, result in iter_file_results(worker_model(), input_path, conf, target_fps):
+            predictions = process_frame_results(result, frame_index)
+            frames += 1
+            detected = fall_predictions(predictions, conf)
+            if detected:
+                falls += 1
+                peak = max(peak, max(pred["confidence"] for pred in detected))
+                if first_fall is None:
+                    first_fall = timestamp
+            out.write(json.dumps({"frame": frame_index, "time": timestamp, "predictions": predictions}) + "\n")
+
+        summary = {
+            "file": input_path,
+            "frames": frames,
+            "fall_frames": falls,
+            "fall_detected": falls > 0,
+            "first_fall_time": first_fall,
+            "peak_confidence": peak,
+            "seconds": time.time() - started,
+        }
+        out.write(json.dumps({"summary": summary}) + "\n")
+    os.replace(partial_path, output_path)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless fall detection over directories of recordings.")
+    parser.add_argument("inputs", nargs="+", help="Directories or glob patterns of images/videos")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_DIR, help="Directory for JSONL results")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--conf", type=float, default=0.5, help="Fall confidence threshold")
+    parser.add_argument("--target-fps", type=float, default=30, help="Sample videos at this frame rate")
+    parser.add_argument("--model", default="model/model.pt")
+    parser.add_argument("--backend", default=None, help="Inference backend, see backends.py")
+    parser.add_argument("--force", action="store_true", help="Reprocess files that already have results")
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    inputs = collect_inputs(args.inputs)
+    summaries, pending = [], []
+    for path in inputs:
+        output_path = result_path(args.output, path)
+        if os.path.exists(output_path) and not args.force:
+            summaries.append(read_summary(output_path))
+        else:
+            pending.append((path, output_path))
+    print(f"{len(inputs)} files found, {len(inputs) - len(pending)} already done, {len(pending)} to process")
+
+    errors = []
+    with create_pool(args.model, args.backend, args.workers) as pool:
+        futures = {
+            pool.submit(process_file, path, output_path, args.conf, args.target_fps): path
+            for path, output_path in pending
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                summary = future.result()
+            except Exception as e:
+                print(f"Error processing {path}: {e}")
+                errors.append({"file": path, "error": str(e)})
+                continue
+            summaries.append(summary)
+            status = "FALL" if summary["fall_detected"] else "ok"
+            print(f"[{status}] {path} ({summary['frames']} frames, {summary['seconds']:.1f}s)")
+
+    summaries.sort(key=lambda summary: summary["file"])
+    with open(os.path.join(args.output, "summary.json"), "w") as f:
+        json.dump({
+            "files": len(summaries),
+            "files_with_falls": sum(summary["fall_detected"] for summary in summaries),
+            "results": summaries,
+            "errors": errors,
+        }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+DEFAULT_VIDEOS = ["TestFiles/test.mp4", "TestFiles/new_test.mp4"]
+STAGES = ("decode", "preprocess", "inference", "postprocess", "process_predictions", "encode", "total")
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(samples):
+    """Turn per-stage latency samples (milliseconds) into fps and p50/p95/p99 figures."""
+    summary = {}
+    for stage, values in samples.items():
+        mean = sum(values) / len(values) if values else 0.0
+        summary[stage] = {
+            "count": len(values),
+            "mean_ms": mean,
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "p99_ms": percentile(values, 99),
+            "fps": 1000 / mean if mean else 0.0,
+        }
+    return summary
+
+
+def run_benchmark(model, videos, threshold=0.5, max_frames=None, warmup=5):
+    """
+    Replay `videos` through the same steps as the live server: decode a frame, classify it
+    (ultralytics preprocess/inference/postprocess), feed the fall probability to an event
+    tracker as process_predictions() does, and JPEG-encode the frame for streaming.
+    :return: Dict of stage name to summary statistics.
+    """
+    import cv2
+    from fall_events import FallEventTracker, fall_probability
+
+    samples = {stage: [] for stage in STAGES}
+    for video in videos:
+        cap = cv2.VideoCapture(video)
+        if not cap.isOpened():
+            raise FileNotFoundError(f"Could not open video {video}")
+        tracker = FallEventTracker()
+        frame_index = 0
+        while max_frames is None or frame_index < max_frames:
+            started = time.perf_counter()
+            ret, frame = cap.read()
+            decoded = time.perf_counter()
+            if not ret:
+                break
+
+            result = model.predict(source=frame, verbose=False)[0]
+            predicted = time.perf_counter()
+
+            pred_conf = fall_probability(result)
+            if pred_conf is not None:
+                tracker.update(pred_conf, threshold)
+            processed = time.perf_counter()
+
+            cv2.imencode('.jpg', frame)
+            encoded = time.perf_counter()
+
+            frame_index += 1
+            if frame_index <= warmup:
+                continue
+            samples["decode"].append(1000 * (decoded - started))
+            for stage in ("preprocess", "inference", "postprocess"):
+                samples[stage].append(result.speed.get(stage, 0.0))
+            samples["process_predictions"].append(1000 * (processed - predicted))
+            samples["encode"].append(1000 * (encoded - processed))
+            samples["total"].append(1000 * (encoded - started))
+        cap.release()
+    return summarize(samples)
+
+
+def compare_to_baseline(report, baseline, tolerance=0.10, metric="p95_ms"):
+    """
+    List every stage whose `metric` got worse than the baseline by more than `tolerance`.
+    :return: List of human readable regression descriptions.
+    """
+    regressions = []
+    for stage, stats in report["stages"].items():
+        reference = baseline.get("stages", {}).get(stage)
+        if not reference or not reference.get(metric):
+            continue
+        ratio = stats[metric] / reference[metric]
+        if ratio > 1 + tolerance:
+            regressions.append(
+                f"{stage}: {metric} {stats[metric]:.2f} vs baseline {reference[metric]:.2f} (+{(ratio - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline per-stage benchmark of the detection pipeline.")
+    parser.add_argument("--videos", nargs="+", default=DEFAULT_VIDEOS)
+    parser.add_argument("--model", default="model/model.pt")
+    parser.add_argument("--backend", default=None, help="Inference backend, see backends.py")
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--max-frames", type=int, default=None, help="Frames per video")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Baseline report to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed p95 slowdown (fraction)")
+    args = parser.parse_args()
+
+    from backends import load_model
+
+    model = load_model(args.model, args.backend)
+    report = {
+        "model": args.model,
+        "backend": args.backend or os.getenv("INFERENCE_BACKEND", "torch"),
+        "videos": args.videos,
+        "stages": run_benchmark(model, args.videos, args.threshold, args.max_frames),
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, "w") as f:
+            f.write(output)
+        print(f"Baseline saved to {args.baseline}")
+    elif args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(report, json.load(f), args.tolerance)
+        if regressions:
+            print("Performance regressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
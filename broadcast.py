@@ -0,0 +1,121 @@
+import threading
+import time
+
+
+class FrameBroadcaster:
+    """
+    Shared slot holding the most recent encoded frame. A single producer publishes into it and
+    any number of subscribers read from it, so capture, inference and encoding happen once per
+    frame no matter how many clients are watching. Slow subscribers simply skip to the newest
+    frame instead of building up a backlog.
+
+    Subscribers may also ask for a quality tier (max width, JPEG quality, max fps). Each tier
+    is encoded at most once per frame, by whichever subscriber needs it first, and shared by
+    everyone else on that tier. A tier's cached frame is dropped when its last subscriber
+    leaves, so only tiers someone is watching hold memory.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._frame = None
+        self._raw = None
+        self._timestamp = None
+        self._seq = 0
+        self._closed = False
+        self._subscribers = 0
+        self._tiers = {}
+        self._tier_locks = {}
+        self._tier_subscribers = {}
+
+    @property
+    def subscribers(self):
+        """Number of currently connected subscribers."""
+        with self._condition:
+            return self._subscribers
+
+    def publish(self, frame_bytes, raw_frame=None, timestamp=None):
+        """
+        Replace the latest frame and wake every waiting subscriber.
+        :param frame_bytes: The frame encoded at full resolution and default quality.
+        :param raw_frame: The decoded frame, needed to serve reduced quality tiers.
+        :param timestamp: Capture time of the frame (epoch seconds), defaults to now.
+        """
+        with self._condition:
+            self._frame = frame_bytes
+            self._raw = raw_frame
+            self._timestamp = time.time() if timestamp is None else timestamp
+            self._seq += 1
+            self._condition.notify_all()
+
+    def latest(self):
+        """Return (sequence number, frame bytes) of the most recent frame."""
+        with self._condition:
+            return self._seq, self._frame
+
+    def close(self):
+        """Signal subscribers that no more frames will be published."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def _encode_tier(self, seq, raw, frame_bytes, width, quality):
+        """Return the frame encoded for one tier, encoding it only once per frame."""
+        key = (width, quality)
+        with self._condition:
+            lock = self._tier_locks.setdefault(key, threading.Lock())
+        with lock:
+            cached = self._tiers.get(key)
+            if cached is not None and cached[0] == seq:
+                return cached[1]
+
+            import cv2
+
+            height, frame_width = raw.shape[:2]
+            if width and width < frame_width:
+                raw = cv2.resize(raw, (width, max(1, height * width // frame_width)), interpolation=cv2.INTER_AREA)
+            success, buffer = cv2.imencode('.jpg', raw, [cv2.IMWRITE_JPEG_QUALITY, quality or 95])
+            encoded = buffer.tobytes() if success else frame_bytes
+            self._tiers[key] = (seq, encoded)
+            return encoded
+
+    def subscribe(self, timeout=10.0, width=None, quality=None, fps=None, with_timestamp=False):
+        """
+        Yield each new frame as it is published. Frames published while the subscriber is busy
+        are dropped, only the newest one is delivered.
+        :param timeout: Seconds to wait for a new frame before giving up on a stalled producer.
+        :param width: Maximum frame width for this subscriber's tier, None keeps the original size.
+        :param quality: JPEG quality (1-100) for this subscriber's tier, None keeps the default encoding.
+        :param fps: Maximum frames per second delivered to this subscriber, None for no limit.
+        :param with_timestamp: Yield (capture timestamp, frame bytes) pairs instead of bytes.
+        """
+        last_seq = 0
+        min_interval = 1.0 / fps if fps else 0.0
+        last_sent = 0.0
+        tier = (width, quality) if width or quality else None
+        with self._condition:
+            self._subscribers += 1
+            if tier is not None:
+                self._tier_subscribers[tier] = self._tier_subscribers.get(tier, 0) + 1
+        try:
+            while True:
+                if min_interval:
+                    time.sleep(max(0.0, last_sent + min_interval - time.monotonic()))
+                with self._condition:
+                    if not self._condition.wait_for(lambda: self._seq != last_seq or self._closed, timeout):
+                        return
+                    if self._seq == last_seq:
+                        return
+                    last_seq, frame, raw, timestamp = self._seq, self._frame, self._raw, self._timestamp
+                if (width or quality) and raw is not None:
+                    frame = self._encode_tier(last_seq, raw, frame, width, quality)
+                last_sent = time.monotonic()
+                yield (timestamp, frame) if with_timestamp else frame
+        finally:
+            with self._condition:
+                self._subscribers -= 1
+                if tier is not None:
+                    self._tier_subscribers[tier] -= 1
+                    if not self._tier_subscribers[tier]:
+                        del self._tier_subscribers[tier]
+                        self._tiers.pop(tier, None)
+                        self._tier_locks.pop(tier, None)
@@ -0,0 +1,169 @@
+import os
+import threading
+import time
+import cv2
+from broadcast import FrameBroadcaster
+from clip_recorder import FrameRingBuffer
+from fall_events import FallEventTracker
+from metrics import REGISTRY
+from motion import MotionGate
+from virtual_camera import open_capture
+
+CAPTURE_SECONDS = REGISTRY.histogram("fallsafe_capture_seconds", "Time spent reading one frame from a camera.")
+FRAMES_CAPTURED = REGISTRY.counter("fallsafe_frames_captured_total", "Frames read from the cameras.")
+FRAMES_DROPPED = REGISTRY.counter("fallsafe_frames_dropped_total", "Captured frames replaced before inference took them.")
+
+
+def parse_camera_sources(value):
+    """
+    Parse a comma separated camera list such as "0,lobby=rtsp://host/stream,TestFiles/test.mp4".
+    "virtual:TestFiles/*.mp4" plays files as a looping real-time camera.
+    Entries may be prefixed with "<cam_id>=", otherwise the id defaults to "cam<index>".
+    :param value: The raw configuration string.
+    :return: Ordered list of (cam_id, source) tuples.
+    """
+    sources = []
+    for index, entry in enumerate(part.strip() for part in value.split(",")):
+        if not entry:
+            continue
+        cam_id, sep, source = entry.partition("=")
+        if not sep or "://" in cam_id:
+            cam_id, source = f"cam{index}", entry
+        sources.append((cam_id.strip(), source.strip()))
+    return sources
+
+
+def load_camera_sources():
+    """Read the camera list from the CAMERA_SOURCES environment variable (defaults to device 0)."""
+    return parse_camera_sources(os.getenv("CAMERA_SOURCES", "0"))
+
+
+class CameraStream:
+    """
+    A single video source (USB device, RTSP URL or video file) with its own reader thread,
+    latest-frame slot, motion gate, fall event tracker, MJPEG broadcaster and a ring buffer of
+    recently encoded frames for event clips.
+    """
+
+    def __init__(self, cam_id, source, tracker=None, motion_gate=None, ring=None):
+        self.cam_id = cam_id
+        self.source = source
+        self.broadcaster = FrameBroadcaster()
+        self.tracker = tracker if tracker is not None else FallEventTracker()
+        self.motion_gate = motion_gate if motion_gate is not None else MotionGate()
+        self.ring = ring if ring is not None else FrameRingBuffer()
+        self.last_fall_prob = None
+        self.event_id = None
+        self._lock = threading.Lock()
+        self._frame = None
+        self._frame_time = None
+        self.last_frame_time = None
+        self._frame_seq = 0
+        self._consumed_seq = 0
+        self._running = False
+        self._thread = None
+
+    @property
+    def fall_detected(self):
+        return self.tracker.active
+
+    @property
+    def is_file(self):
+        return os.path.isfile(self.source)
+
+    def open(self):
+        """Open the underlying capture device."""
+        cap = open_capture(self.source)
+        if not cap.isOpened():
+            raise RuntimeError(f"Could not open camera '{self.cam_id}' at {self.source}")
+        return cap
+
+    def start(self):
+        """Start the background reader thread."""
+        self._running = True
+        self._thread = threading.Thread(target=self._read_loop, name=f"camera-{self.cam_id}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+
+    @property
+    def running(self):
+        return self._running
+
+    def _read_loop(self):
+        """Keep only the newest frame so a slow inference tick never queues stale frames."""
+        try:
+            cap = self.open()
+        except RuntimeError as e:
+            print(e)
+            self._running = False
+            self.broadcaster.close()
+            return
+
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        if fps and fps > 0:
+            self.ring.set_fps(fps)
+        # Files are paced to their native frame rate so they behave like live cameras.
+        frame_interval = 0.0
+        if self.is_file:
+            frame_interval = 1.0 / fps if fps and fps > 0 else 1.0 / 30
+
+        while self._running:
+            started = time.monotonic()
+            ret, frame = cap.read()
+            if not ret:
+                print(f"No frame captured from camera '{self.cam_id}'.")
+                break
+            CAPTURE_SECONDS.observe(time.monotonic() - started)
+            FRAMES_CAPTURED.inc(camera=self.cam_id)
+            with self._lock:
+                if self._frame_seq != self._consumed_seq:
+                    FRAMES_DROPPED.inc(camera=self.cam_id)
+                self._frame = frame
+                self._frame_time = time.time()
+                self._frame_seq += 1
+            if frame_interval:
+                time.sleep(max(0.0, frame_interval - (time.monotonic() - started)))
+
+        cap.release()
+        self._running = False
+        self.broadcaster.close()
+        # No more frames will arrive for clips still waiting on their post-event window
+        self.ring.finish_captures()
+
+    def take_frame(self):
+        """
+        Return the newest frame not yet handed to the inference loop, or None. Its capture
+        time (epoch seconds) is left in `last_frame_time`.
+        """
+        with self._lock:
+            if self._frame is None or self._frame_seq == self._consumed_seq:
+                return None
+            self._consumed_seq = self._frame_seq
+            self.last_frame_time = self._frame_time
+            return self._frame
+
+
+def create_cameras(sources=None, tracker_factory=FallEventTracker, gate_factory=MotionGate,
+                   ring_factory=FrameRingBuffer):
+    """Build an ordered {cam_id: CameraStream} mapping from the configured sources."""
+    if sources is None:
+        sources = load_camera_sources()
+    return {
+        cam_id: CameraStream(cam_id, source, tracker_factory(), gate_factory(), ring_factory())
+        for cam_id, source in sources
+    }
+
+
+def gather_batch(cameras):
+    """
+    Collect one fresh frame from every camera that produced one since the last tick.
+    :return: List of (camera, frame) pairs ready for a single batched model call.
+    """
+    batch = []
+    for camera in cameras.values():
+        frame = camera.take_frame()
+        if frame is not None:
+            batch.append((camera, frame))
+    return batch
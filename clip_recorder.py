@@ -0,0 +1,185 @@
+import math
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+
+class FrameRingBuffer:
+    """
+    Bounded buffer of the most recent frames of one camera, stored as the JPEG bytes that were
+    already encoded for streaming, so keeping several seconds of history costs little memory.
+    Pending clip captures attached to the buffer also receive every new frame until their
+    post-event window is full. Frames are dropped by age; the frame cap, sized from `seconds`
+    and the frame rate, only bounds memory and grows when the camera reports a higher rate.
+    """
+
+    def __init__(self, seconds=5.0, fps=60.0):
+        self.seconds = seconds
+        self._frames = deque(maxlen=self._capacity(fps))
+        self._captures = []
+        self._lock = threading.Lock()
+
+    def _capacity(self, fps):
+        return max(1, math.ceil(self.seconds * fps))
+
+    def set_fps(self, fps):
+        """Make room for `seconds` of frames at the camera's frame rate once it is known."""
+        capacity = self._capacity(fps)
+        with self._lock:
+            if capacity > self._frames.maxlen:
+                self._frames = deque(self._frames, maxlen=capacity)
+
+    def append(self, jpeg_bytes, timestamp=None):
+        """Add one encoded frame and feed it to every capture still waiting for post-event frames."""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            self._frames.append((timestamp, jpeg_bytes))
+            while self._frames and timestamp - self._frames[0][0] > self.seconds:
+                self._frames.popleft()
+            captures = list(self._captures)
+        for capture in captures:
+            if capture.add(timestamp, jpeg_bytes):
+                with self._lock:
+                    self._captures.remove(capture)
+
+    def latest(self):
+        """The newest (timestamp, jpeg bytes) pair, or None while the buffer is empty."""
+        with self._lock:
+            return self._frames[-1] if self._frames else None
+
+    def snapshot(self):
+        """Copy of the buffered (timestamp, jpeg bytes) pairs, oldest first."""
+        with self._lock:
+            return list(self._frames)
+
+    def attach(self, capture):
+        with self._lock:
+            capture.frames.extend(self._frames)
+            self._captures.append(capture)
+
+    def finish_captures(self):
+        """Write the clips still waiting for post-event frames with what they have; used when the camera stops."""
+        with self._lock:
+            captures, self._captures = self._captures, []
+        for capture in captures:
+            capture.finish()
+
+
+class _ClipCapture:
+    def __init__(self, recorder, basename, end_time, on_thumbnail, on_clip):
+        self.recorder = recorder
+        self.basename = basename
+        self.end_time = end_time
+        self.on_thumbnail = on_thumbnail
+        self.on_clip = on_clip
+        self.frames = []
+        self._thumbnail_done = False
+
+    def add(self, timestamp, jpeg_bytes):
+        """Collect one post-event frame; return True once the capture is complete."""
+        self.frames.append((timestamp, jpeg_bytes))
+        if not self._thumbnail_done:
+            self._thumbnail_done = True
+            self.recorder.submit(self.recorder._write_thumbnail, jpeg_bytes, self.basename + ".jpg", self.on_thumbnail)
+        if timestamp >= self.end_time:
+            self.finish()
+            return True
+        return False
+
+    def finish(self):
+        """Queue the clip, and the thumbnail if no post-event frame arrived, from the frames collected so far."""
+        if not self.frames:
+            return
+        if not self._thumbnail_done:
+            self._thumbnail_done = True
+            self.recorder.submit(self.recorder._write_thumbnail, self.frames[-1][1], self.basename + ".jpg", self.on_thumbnail)
+        self.recorder.submit(self.recorder._write_clip, self.frames, self.basename + ".mp4", self.on_clip)
+
+
+class ClipRecorder:
+    """
+    Writes pre/post-event clips and thumbnails on a background thread. `record()` only
+    attaches a capture to the camera's ring buffer; decoding the buffered JPEGs and encoding
+    the clip never happens on the capture or inference path.
+    """
+
+    def __init__(self, pre_seconds=5.0, post_seconds=5.0, maxsize=16):
+        self.pre_seconds = pre_seconds
+        self.post_seconds = post_seconds
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._worker, name="clip-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def submit(self, func, *args):
+        try:
+            self._queue.put_nowait((func, args))
+        except queue.Full:
+            print("Clip writer queue full, dropping job.")
+
+    def record(self, ring, basename, on_thumbnail=None, on_clip=None):
+        """
+        Start capturing a clip around now: the frames already in `ring` plus the next
+        post_seconds of frames. Writes <basename>.jpg with the first post-event frame, then
+        <basename>.mp4 once the post-event window is complete.
+        :param on_thumbnail: Called with the thumbnail path from the writer thread once it exists.
+        :param on_clip: Called with the clip path from the writer thread once it is complete.
+        """
+        directory = os.path.dirname(basename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        ring.attach(_ClipCapture(self, basename, time.time() + self.post_seconds, on_thumbnail, on_clip))
+        return basename + ".mp4", basename + ".jpg"
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            func, args = job
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"Error writing clip: {e}")
+
+    def _write_thumbnail(self, jpeg_bytes, path, on_thumbnail):
+        with open(path, "wb") as f:
+            f.write(jpeg_bytes)
+        if on_thumbnail is not None:
+            on_thumbnail(path)
+
+    def _write_clip(self, frames, path, on_clip=None):
+        frames = [(ts, data) for ts, data in frames if ts >= frames[-1][0] - self.pre_seconds - self.post_seconds]
+        if not frames:
+            return
+        span = frames[-1][0] - frames[0][0]
+        fps = (len(frames) - 1) / span if span > 0 else 10.0
+        writer = None
+        try:
+            for _, data in frames:
+                image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+                if image is None:
+                    continue
+                if writer is None:
+                    height, width = image.shape[:2]
+                    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+                writer.write(image)
+        finally:
+            if writer is not None:
+                writer.release()
+        print(f"Saved event clip to {path}")
+        if on_clip is not None:
+            on_clip(path)
@@ -0,0 +1,68 @@
+import numpy as np
+
+IMAGE_EXTENSIONS = ('.jpg', '.png', '.jpeg', '.bmp', '.dng', '.mpo', '.tif', '.tiff', '.webp', '.pfm', '.heic')
+VIDEO_EXTENSIONS = ('.asf', '.avi', '.gif', '.m4v', '.mkv', '.mov', '.mp4', '.mpeg', '.mpg', '.ts', '.wmv', '.webm')
+
+
+def frame_arrays(result):
+    """
+    Extract the detections of one frame as NumPy arrays without building per-box objects.
+    Detection models produce one row per box; classification models produce a single
+    whole-frame row for the top-1 class.
+    :return: Tuple (xywh float32 array of shape (N, 4), class ids int array, confidences float32 array).
+    """
+    boxes = getattr(result, 'boxes', None)
+    if boxes is None:
+        probs = getattr(result, 'probs', None)
+        if probs is None:
+            return np.empty((0, 4), np.float32), np.empty(0, np.int16), np.empty(0, np.float32)
+        height, width = result.orig_shape
+        xywh = np.array([[width / 2, height / 2, width, height]], np.float32)
+        return xywh, np.array([probs.top1], np.int16), np.array([float(probs.top1conf)], np.float32)
+
+    data = boxes.data.cpu().numpy() if hasattr(boxes.data, "cpu") else np.asarray(boxes.data)
+    xywh = boxes.xywh.cpu().numpy() if hasattr(boxes.xywh, "cpu") else np.asarray(boxes.xywh)
+    return xywh.astype(np.float32), data[:, -1].astype(np.int16), data[:, -2].astype(np.float32)
+
+
+def detection_id(frame_index, offset):
+    """ID of the `offset`-th detection of a frame, unique within one analysed file."""
+    return f"{frame_index}-{offset}"
+
+
+def process_frame_results(result, frame_index=0):
+    """Process single frame results into structured JSON format"""
+    xywh, class_ids, confidences = frame_arrays(result)
+    return [
+        {
+            "x": float(x),
+            "y": float(y),
+            "width": float(w),
+            "height": float(h),
+            "class": result.names[int(cls)],
+            "confidence": float(conf),
+            "detection_id": detection_id(frame_index, index)
+        }
+        for index, ((x, y, w, h), cls, conf) in enumerate(zip(xywh, class_ids, confidences))
+    ]
+
+
+def iter_file_results(model, path, conf, target_fps=None):
+    """
+    Classify an image or video file frame by frame.
+    :return: Generator of (frame_index, timestamp_seconds, result) tuples.
+    """
+    if path.lower().endswith(IMAGE_EXTENSIONS):
+        for result in model.predict(source=path, conf=conf, verbose=False):
+            yield 0, 0.0, result
+        return
+
+    from video_io import iter_sampled_frames
+
+    for frame_index, timestamp, frame in iter_sampled_frames(path, target_fps):
+        yield frame_index, timestamp, model.predict(source=frame, conf=conf, verbose=False)[0]
+
+
+def fall_predictions(predictions, threshold):
+    """Return the predictions of one frame that count as a fall above `threshold`."""
+    return [pred for pred in predictions if pred["class"] == "fall" and pred["confidence"] > threshold]
@@ -0,0 +1,201 @@
+import glob
+import json
+import os
+import numpy as np
+
+from detection import detection_id
+
+CHUNK_SIZE = 65536
+FORMATS = ("npz", "parquet")
+
+
+class DetectionStore:
+    """
+    Columnar, append-only store of per-frame detections. Rows are written into preallocated
+    NumPy arrays (frame index, xywh, class id, confidence); every `chunk_size` rows the chunk
+    is flushed to disk as an .npz file or a Parquet row group, so memory stays bounded no
+    matter how long the video is.
+    """
+
+    def __init__(self, path, names, chunk_size=CHUNK_SIZE, fmt="npz", jsonl_path=None):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown detection store format: {fmt}")
+        self.path = path
+        self.names = {int(k): v for k, v in names.items()}
+        self.chunk_size = chunk_size
+        self.fmt = fmt
+        self.count = 0
+        self._chunks_written = 0
+        self._size = 0
+        self._frame = np.empty(chunk_size, dtype=np.int64)
+        self._xywh = np.empty((chunk_size, 4), dtype=np.float32)
+        self._class_id = np.empty(chunk_size, dtype=np.int16)
+        self._confidence = np.empty(chunk_size, dtype=np.float32)
+        self._parquet_writer = None
+        self._jsonl = open(jsonl_path, "w") if jsonl_path else None
+        self._jsonl_pending = None
+
+        if fmt == "npz":
+            os.makedirs(path, exist_ok=True)
+            with open(os.path.join(path, "names.json"), "w") as f:
+                json.dump(self.names, f)
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def append(self, frame_index, xywh, class_ids, confidences):
+        """Append all detections of one frame; the arrays must have the same length."""
+        rows = len(class_ids)
+        offset = 0
+        while offset < rows:
+            take = min(rows - offset, self.chunk_size - self._size)
+            end = self._size + take
+            self._frame[self._size:end] = frame_index
+            self._xywh[self._size:end] = xywh[offset:offset + take]
+            self._class_id[self._size:end] = class_ids[offset:offset + take]
+            self._confidence[self._size:end] = confidences[offset:offset + take]
+            self._size = end
+            offset += take
+            if self._size == self.chunk_size:
+                self.flush()
+        self.count += rows
+
+    def _chunk(self):
+        size = self._size
+        return {
+            "frame": self._frame[:size],
+            "xywh": self._xywh[:size],
+            "class_id": self._class_id[:size],
+            "confidence": self._confidence[:size],
+        }
+
+    def flush(self):
+        """Write the buffered rows to disk and reuse the arrays for the next chunk."""
+        if not self._size:
+            return
+        chunk = self._chunk()
+        if self.fmt == "npz":
+            np.savez(os.path.join(self.path, f"chunk_{self._chunks_written:05d}.npz"), **chunk)
+        else:
+            self._write_parquet(chunk)
+        if self._jsonl is not None:
+            self._jsonl_pending = write_jsonl_chunk(self._jsonl, chunk, self.names, self._jsonl_pending)
+        self._chunks_written += 1
+        self._size = 0
+
+    def _write_parquet(self, chunk):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.table({
+            "frame": chunk["frame"],
+            "x": chunk["xywh"][:, 0],
+            "y": chunk["xywh"][:, 1],
+            "width": chunk["xywh"][:, 2],
+            "height": chunk["xywh"][:, 3],
+            "class_id": chunk["class_id"],
+            "confidence": chunk["confidence"],
+        })
+        if self._parquet_writer is None:
+            schema = table.schema.with_metadata({"names": json.dumps(self.names)})
+            self._parquet_writer = pq.ParquetWriter(self.path, schema)
+        self._parquet_writer.write_table(table.cast(self._parquet_writer.schema))
+
+    def close(self):
+        """Flush the last partial chunk and close the output files."""
+        self.flush()
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+        if self._jsonl is not None:
+            write_jsonl_record(self._jsonl, self._jsonl_pending)
+            self._jsonl_pending = None
+            self._jsonl.close()
+            self._jsonl = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_chunks(path):
+    """
+    Read a store back chunk by chunk.
+    :return: Tuple (names, generator of chunk dicts with frame/xywh/class_id/confidence arrays).
+    """
+    if os.path.isdir(path):
+        with open(os.path.join(path, "names.json")) as f:
+            names = {int(k): v for k, v in json.load(f).items()}
+
+        def chunks():
+            for chunk_path in sorted(glob.glob(os.path.join(path, "chunk_*.npz"))):
+                with np.load(chunk_path) as data:
+                    yield {key: data[key] for key in data.files}
+        return names, chunks()
+
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(path)
+    names = {int(k): v for k, v in json.loads(parquet.schema_arrow.metadata[b"names"]).items()}
+
+    def chunks():
+        for group in range(parquet.num_row_groups):
+            table = parquet.read_row_group(group)
+            yield {
+                "frame": table["frame"].to_numpy(),
+                "xywh": np.stack([table[col].to_numpy() for col in ("x", "y", "width", "height")], axis=1),
+                "class_id": table["class_id"].to_numpy(),
+                "confidence": table["confidence"].to_numpy(),
+            }
+    return names, chunks()
+
+
+def write_jsonl_chunk(f, chunk, names, pending=None):
+    """
+    Write one chunk as JSON lines in the legacy per-frame {"predictions": [...]} layout.
+    The rows of one frame can span two chunks, so the chunk's last frame is returned instead
+    of written: pass it back with the next chunk and hand the final one to `write_jsonl_record`.
+    """
+    frames = chunk["frame"]
+    if not len(frames):
+        return pending
+    records = [] if pending is None else [pending]
+    boundaries = np.flatnonzero(np.diff(frames)) + 1
+    for rows in np.split(np.arange(len(frames)), boundaries):
+        frame_index = int(frames[rows[0]])
+        if not records or records[-1]["frame"] != frame_index:
+            records.append({"frame": frame_index, "predictions": []})
+        predictions = records[-1]["predictions"]
+        start = len(predictions)
+        predictions.extend(
+            {
+                "x": float(chunk["xywh"][row, 0]),
+                "y": float(chunk["xywh"][row, 1]),
+                "width": float(chunk["xywh"][row, 2]),
+                "height": float(chunk["xywh"][row, 3]),
+                "class": names[int(chunk["class_id"][row])],
+                "confidence": float(chunk["confidence"][row]),
+                "detection_id": detection_id(frame_index, start + offset),
+            }
+            for offset, row in enumerate(rows)
+        )
+    for record in records[:-1]:
+        write_jsonl_record(f, record)
+    return records[-1]
+
+
+def write_jsonl_record(f, record):
+    """Write one frame's record left over by `write_jsonl_chunk`, if any."""
+    if record is not None:
+        f.write(json.dumps(record) + "\n")
+
+
+def export_jsonl(store_path, jsonl_path):
+    """Stream a stored result set into a JSONL file without loading it all into memory."""
+    names, chunks = iter_chunks(store_path)
+    with open(jsonl_path, "w") as f:
+        pending = None
+        for chunk in chunks:
+            pending = write_jsonl_chunk(f, chunk, names, pending)
+        write_jsonl_record(f, pending)
@@ -0,0 +1,181 @@
+import math
+import os
+from collections import deque
+
+import cv2
+import numpy as np
+
+from video_io import iter_sampled_frames, video_fps
+
+FALL_COLOR = (0, 0, 255)
+OTHER_COLOR = (0, 200, 0)
+
+
+def annotate(frame, xywh, class_ids, confidences, names, fall_ids, scale=1.0):
+    """
+    Draw the detections of one frame onto a copy of it. Whole-frame rows (classification
+    results) become a banner in the top-left corner, boxes are drawn as rectangles.
+    :param scale: Factor from detection coordinates to `frame` pixels.
+    """
+    frame = frame.copy()
+    height, width = frame.shape[:2]
+    for (x, y, w, h), cls, conf in zip(xywh * scale, class_ids, confidences):
+        color = FALL_COLOR if cls in fall_ids else OTHER_COLOR
+        text = f"{names[int(cls)]} {conf:.2f}"
+        if w >= width - 1 and h >= height - 1:
+            cv2.rectangle(frame, (0, 0), (width - 1, height - 1), color, 2)
+            cv2.putText(frame, text, (8, 24), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+        else:
+            top_left = (int(x - w / 2), int(y - h / 2))
+            cv2.rectangle(frame, top_left, (int(x + w / 2), int(y + h / 2)), color, 2)
+            cv2.putText(frame, text, (top_left[0], max(12, top_left[1] - 4)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
+    return frame
+
+
+def _resize(frame, max_width):
+    height, width = frame.shape[:2]
+    if not max_width or width <= max_width:
+        return frame, 1.0
+    scale = max_width / width
+    return cv2.resize(frame, (max_width, max(1, int(height * scale))), interpolation=cv2.INTER_AREA), scale
+
+
+class EventOutputWriter:
+    """
+    Writes annotated output only around fall events instead of rendering every frame: one
+    clip per event with `pre_seconds` of lead-in and `post_seconds` after the last fall frame,
+    a full-resolution annotated thumbnail of each event's first frame, and optionally a
+    low-resolution overview timeline sampled at `timeline_fps`. With `write_clips` off (still
+    images) only the thumbnails are written.
+    Frames outside events are only downscaled into a short lead-in buffer; nothing is drawn
+    or encoded for them.
+    """
+
+    def __init__(self, directory, basename, fps, names, fall_ids, threshold=0.5, pre_seconds=2.0, post_seconds=2.0,
+                 clip_width=640, timeline_width=0, timeline_fps=1.0, write_clips=True):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.basename = basename
+        self.fps = fps
+        self.names = names
+        self.fall_ids = fall_ids
+        self.threshold = threshold
+        self.clip_width = clip_width
+        self.write_clips = write_clips
+        self.post_frames = int(round(post_seconds * fps))
+        self.timeline_width = timeline_width
+        self.timeline_every = max(1, int(round(fps / timeline_fps))) if timeline_width else 0
+        self._lead_in = deque(maxlen=max(0, int(round(pre_seconds * fps))) if write_clips else 0)
+        self._in_event = False
+        self._clip = None
+        self._remaining = 0
+        self._timeline = None
+        self.clips = []
+        self.thumbnails = []
+        self.timeline_path = None
+
+    def _path(self, suffix):
+        return os.path.join(self.directory, f"{self.basename}{suffix}")
+
+    def _open_writer(self, path, frame, fps):
+        height, width = frame.shape[:2]
+        return cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+
+    def add(self, frame_index, frame, xywh, class_ids, confidences):
+        """Feed one analysed frame in order."""
+        is_fall = bool((np.isin(class_ids, self.fall_ids) & (confidences > self.threshold)).any())
+        if self.timeline_every and frame_index % self.timeline_every == 0:
+            self._add_to_timeline(frame, xywh, class_ids, confidences)
+
+        if is_fall and not self._in_event:
+            self._start_event(frame, xywh, class_ids, confidences)
+        if self._in_event:
+            if self._clip is not None:
+                small, scale = _resize(frame, self.clip_width)
+                self._clip.write(annotate(small, xywh, class_ids, confidences, self.names, self.fall_ids, scale))
+            self._remaining = self.post_frames if is_fall else self._remaining - 1
+            if self._remaining <= 0:
+                self._end_event()
+        elif self._lead_in.maxlen:
+            self._lead_in.append((*_resize(frame, self.clip_width), xywh, class_ids, confidences))
+
+    def _start_event(self, frame, xywh, class_ids, confidences):
+        self._in_event = True
+        number = len(self.thumbnails) + 1
+        thumbnail_path = self._path(f"_fall_{number}.jpg")
+        cv2.imwrite(thumbnail_path, annotate(frame, xywh, class_ids, confidences, self.names, self.fall_ids))
+        self.thumbnails.append(thumbnail_path)
+        if not self.write_clips:
+            return
+
+        small, _ = _resize(frame, self.clip_width)
+        clip_path = self._path(f"_fall_{number}.mp4")
+        self._clip = self._open_writer(clip_path, small, self.fps)
+        self.clips.append(clip_path)
+        for buffered, scale, *detections in self._lead_in:
+            if buffered.shape == small.shape:
+                self._clip.write(annotate(buffered, *detections, self.names, self.fall_ids, scale))
+        self._lead_in.clear()
+
+    def _end_event(self):
+        self._in_event = False
+        if self._clip is not None:
+            self._clip.release()
+            self._clip = None
+
+    def reset(self):
+        """Finish any open clip and forget the lead-in, before feeding a non-contiguous range of frames."""
+        if self._in_event:
+            self._end_event()
+        self._lead_in.clear()
+
+    def _add_to_timeline(self, frame, xywh, class_ids, confidences):
+        small, scale = _resize(frame, self.timeline_width)
+        annotated = annotate(small, xywh, class_ids, confidences, self.names, self.fall_ids, scale)
+        if self._timeline is None:
+            self.timeline_path = self._path("_timeline.mp4")
+            self._timeline = self._open_writer(self.timeline_path, annotated, 10.0)
+        self._timeline.write(annotated)
+
+    def close(self):
+        """Finish any open clip and the timeline; returns the written files."""
+        if self._in_event:
+            self._end_event()
+        if self._timeline is not None:
+            self._timeline.release()
+            self._timeline = None
+        return {"clips": self.clips, "thumbnails": self.thumbnails, "timeline": self.timeline_path}
+
+
+def write_event_ranges(writer, video_path, target_fps, frame, xywh, class_id, confidence, events,
+                       pre_seconds, post_seconds):
+    """
+    Re-decode only the frames around `events` and feed them to `writer`, for runs that did not
+    keep the decoded frames (parallel segments, cached results). Frames are sampled on the same
+    grid as the analysis, so each one finds its detections again.
+    :param frame: Video frame index of every detection row, ascending, as in a DetectionStore.
+    :param events: Dicts with start_frame and end_frame (video frame indices).
+    :return: Number of frames decoded.
+    """
+    cap = cv2.VideoCapture(video_path)
+    fps = video_fps(cap)
+    cap.release()
+    pre_frames, post_frames = math.ceil(pre_seconds * fps), math.ceil(post_seconds * fps) + 1
+
+    ranges = []
+    for event in sorted(events, key=lambda event: event["start_frame"]):
+        start, end = max(0, event["start_frame"] - pre_frames), event["end_frame"] + post_frames
+        if ranges and start <= ranges[-1][1]:
+            ranges[-1][1] = max(ranges[-1][1], end)
+        else:
+            ranges.append([start, end])
+
+    decoded = 0
+    for start, end in ranges:
+        writer.reset()
+        for frame_index, _, image in iter_sampled_frames(video_path, target_fps, start, end):
+            rows = slice(np.searchsorted(frame, frame_index, "left"), np.searchsorted(frame, frame_index, "right"))
+            writer.add(decoded, image, xywh[rows], class_id[rows], confidence[rows])
+            decoded += 1
+    writer.reset()
+    return decoded
@@ -0,0 +1,133 @@
+import os
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    camera TEXT NOT NULL,
+    start_time REAL NOT NULL,
+    end_time REAL,
+    peak_confidence REAL,
+    frame_path TEXT,
+    clip_path TEXT,
+    media_bytes INTEGER NOT NULL DEFAULT 0,
+    alert_status TEXT NOT NULL DEFAULT 'pending'
+);
+CREATE INDEX IF NOT EXISTS idx_events_start_time ON events (start_time);
+CREATE INDEX IF NOT EXISTS idx_events_camera_start_time ON events (camera, start_time);
+CREATE INDEX IF NOT EXISTS idx_events_media ON events (id) WHERE media_bytes > 0;
+"""
+
+COLUMNS = ("id", "camera", "start_time", "end_time", "peak_confidence", "frame_path", "clip_path",
+           "media_bytes", "alert_status")
+
+
+class EventStore:
+    """
+    Persistent history of fall events in SQLite (WAL mode, indexed by time and camera), with
+    size-based retention that deletes the media of the oldest events once the total exceeds
+    `max_media_bytes`. The event rows themselves are kept so history stays queryable.
+    """
+
+    def __init__(self, path, max_media_bytes=1 << 30):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_media_bytes = max_media_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _execute(self, sql, params=()):
+        with self._lock, self._conn:
+            return self._conn.execute(sql, params)
+
+    def open_event(self, camera, start_time, peak_confidence, frame_path=None, clip_path=None):
+        """Insert a new event and return its id."""
+        cursor = self._execute(
+            "INSERT INTO events (camera, start_time, peak_confidence, frame_path, clip_path) VALUES (?, ?, ?, ?, ?)",
+            (camera, start_time, peak_confidence, frame_path, clip_path)
+        )
+        return cursor.lastrowid
+
+    def close_event(self, event_id, end_time, peak_confidence):
+        self._execute("UPDATE events SET end_time = ?, peak_confidence = MAX(COALESCE(peak_confidence, 0), ?) WHERE id = ?",
+                      (end_time, peak_confidence, event_id))
+
+    def set_alert_status(self, event_id, status):
+        self._execute("UPDATE events SET alert_status = ? WHERE id = ?", (status, event_id))
+
+    def add_media(self, event_id, path):
+        """Account for a media file written for an event, then apply the retention policy."""
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        self._execute("UPDATE events SET media_bytes = media_bytes + ? WHERE id = ?", (size, event_id))
+        self.enforce_retention()
+
+    def get(self, event_id):
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(COLUMNS)} FROM events WHERE id = ?", (event_id,)).fetchone()
+        return dict(row) if row else None
+
+    def query(self, since=None, camera=None, limit=50, before_id=None):
+        """
+        Newest-first page of events.
+        :param since: Only events that started at or after this timestamp.
+        :param camera: Only events of this camera.
+        :param limit: Page size.
+        :param before_id: Cursor from the previous page; only events with a smaller id.
+        """
+        clauses, params = [], []
+        if since is not None:
+            clauses.append("start_time >= ?")
+            params.append(since)
+        if camera:
+            clauses.append("camera = ?")
+            params.append(camera)
+        if before_id is not None:
+            clauses.append("id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM events {where} ORDER BY id DESC LIMIT ?", params
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def media_bytes(self):
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(media_bytes), 0) FROM events").fetchone()[0]
+
+    def enforce_retention(self):
+        """Delete the media of the oldest events until the total size fits `max_media_bytes`."""
+        total = self.media_bytes()
+        if total <= self.max_media_bytes:
+            return 0
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, frame_path, clip_path, media_bytes FROM events WHERE media_bytes > 0 ORDER BY id"
+            ).fetchall()
+        evicted = 0
+        for row in rows:
+            if total <= self.max_media_bytes:
+                break
+            for path in (row["frame_path"], row["clip_path"]):
+                if path and os.path.exists(path):
+                    try:
+                        os.remove(path)
+                    except OSError as e:
+                        print(f"Error deleting {path}: {e}")
+            self._execute("UPDATE events SET media_bytes = 0, frame_path = NULL, clip_path = NULL WHERE id = ?",
+                          (row["id"],))
+            total -= row["media_bytes"]
+            evicted += 1
+        return evicted
@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import deque
+
+
+class FallEventTracker:
+    """
+    Per-stream state machine turning noisy per-frame classifications into fall events.
+    The fall probability is smoothed over a sliding window; an event opens after
+    `open_frames` consecutive smoothed fall frames and closes after `close_frames`
+    consecutive nofall frames. Each event raises at most one alert, and alerts are
+    further spaced by `cooldown` seconds.
+    """
+
+    def __init__(self, window=5, open_frames=3, close_frames=10, cooldown=60.0):
+        self.window = deque(maxlen=window)
+        self.open_frames = open_frames
+        self.close_frames = close_frames
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self.active = False
+        self.event_count = 0
+        self.started_at = None
+        self.ended_at = None
+        self.peak_confidence = 0.0
+        self.smoothed = 0.0
+        self.last_alert_at = None
+        self._fall_streak = 0
+        self._nofall_streak = 0
+
+    def update(self, fall_prob, threshold, now=None):
+        """
+        Feed the fall probability of one frame.
+        :param fall_prob: Probability of the 'fall' class for this frame.
+        :param threshold: Minimum smoothed probability for a frame to count as a fall.
+        :param now: Timestamp of the frame, defaults to time.time().
+        :return: Tuple (transition, should_alert) where transition is "started", "ended" or None.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self.window.append(fall_prob)
+            self.smoothed = sum(self.window) / len(self.window)
+
+            if self.smoothed >= threshold:
+                self._fall_streak += 1
+                self._nofall_streak = 0
+            else:
+                self._nofall_streak += 1
+                self._fall_streak = 0
+
+            if self.active:
+                self.peak_confidence = max(self.peak_confidence, fall_prob)
+                if self._nofall_streak >= self.close_frames:
+                    self.active = False
+                    self.ended_at = now
+                    return "ended", False
+                return None, False
+
+            if self._fall_streak >= self.open_frames:
+                self.active = True
+                self.event_count += 1
+                self.started_at = now
+                self.ended_at = None
+                self.peak_confidence = fall_prob
+                should_alert = self.last_alert_at is None or now - self.last_alert_at >= self.cooldown
+                if should_alert:
+                    self.last_alert_at = now
+                return "started", should_alert
+            return None, False
+
+    def status(self):
+        """Snapshot of the current event state for the status endpoints."""
+        with self._lock:
+            return {
+                "active": self.active,
+                "event_count": self.event_count,
+                "started_at": self.started_at,
+                "ended_at": self.ended_at,
+                "peak_confidence": self.peak_confidence,
+                "smoothed_confidence": self.smoothed,
+                "last_alert_at": self.last_alert_at,
+            }
+
+
+def fall_probability(result, fall_class="fall"):
+    """
+    Extract the probability of the fall class from a classification result.
+    :return: The probability, or None if the result carries no class probabilities.
+    """
+    probs = result.probs
+    if probs is None:
+        return None
+    for class_idx, class_name in result.names.items():
+        if class_name == fall_class:
+            return probs.data[class_idx].item()
+    return None
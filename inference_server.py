@@ -0,0 +1,312 @@
+import atexit
+import itertools
+import math
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import connection, shared_memory
+
+import cv2
+import numpy as np
+
+from backends import ensure_export
+
+
+class RemoteProbs:
+    """Top-1 view of the class probabilities returned by a worker, shaped like ultralytics' Probs."""
+
+    def __init__(self, data):
+        self.data = data
+        self.top1 = int(np.argmax(data))
+        self.top1conf = float(data[self.top1])
+
+
+class RemoteResult:
+    """Lightweight classification result carrying only what the server needs from a worker."""
+
+    boxes = None
+
+    def __init__(self, names, data, orig_shape):
+        self.names = names
+        self.probs = RemoteProbs(data)
+        self.orig_shape = orig_shape
+
+
+def _worker_main(worker_id, model_path, backend, shm_name, slot_size, conn):
+    """
+    Entry point of an inference worker process: load the model once, then classify frames
+    read directly from the shared-memory slots named in each request received on `conn`.
+    """
+    from backends import load_model
+    from startup import warm_up
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        model = load_model(model_path, backend)
+        warm_up(model)
+        conn.send(("ready", worker_id, model.names, None))
+        while True:
+            try:
+                request = conn.recv()
+            except EOFError:
+                break
+            if request is None:
+                break
+            request_id, slot, shape, dtype, kwargs = request
+            frame = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=slot * slot_size)
+            result = None
+            try:
+                result = model.predict(source=frame, verbose=False, **kwargs)[0]
+                probs = result.probs.data.cpu().numpy() if hasattr(result.probs.data, "cpu") else np.asarray(result.probs.data)
+                conn.send((request_id, slot, probs.astype(np.float32), None))
+            except Exception as e:
+                conn.send((request_id, slot, None, str(e)))
+            finally:
+                # Views into the slot must not outlive the request, or the segment cannot be closed.
+                frame = result = None
+    except Exception as e:
+        conn.send(("ready", worker_id, None, str(e)))
+    finally:
+        try:
+            shm.close()
+        except BufferError:
+            pass
+
+
+class InferencePool:
+    """
+    Hosts the classifier in dedicated worker processes so `model.predict` and its GIL-heavy
+    pre/post-processing never compete with the Flask threads. Frames are copied once into a
+    ring of shared-memory slots and the workers read them in place; only the slot index goes
+    through the worker's pipe and only the class probabilities come back.
+    Every worker has its own pipe, so the pool knows which requests each one holds: a worker
+    that dies is replaced, and its requests fail instead of keeping their slots forever. A
+    replacement that cannot load the model is retried with exponential backoff.
+    `predict()` mirrors YOLO.predict for a frame or a list of frames.
+    """
+
+    def __init__(self, model_path, backend=None, workers=1, slots=8, max_frame_shape=(1080, 1920, 3)):
+        self.model_path = model_path
+        self.backend = backend
+        self.workers = workers
+        self.slots = slots
+        self.slot_size = int(np.prod(max_frame_shape))
+        self.names = None
+        self.restarts = 0
+        self._ctx = multiprocessing.get_context("spawn")
+        self._free_slots = queue.Queue()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._processes = {}
+        self._conns = {}
+        self._send_locks = {}
+        self._assigned = {}
+        self._ready = set()
+        self._retry_at = {}
+        self._backoff = {}
+        self._stopping = False
+        self._shm = None
+
+    def start(self, timeout=300):
+        """Create the shared memory, spawn the workers and wait until every model is loaded."""
+        ensure_export(self.model_path, self.backend)
+        self._shm = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_size)
+        atexit.register(self.stop)
+        for slot in range(self.slots):
+            self._free_slots.put(slot)
+        for worker_id in range(self.workers):
+            self._spawn(worker_id)
+
+        for worker_id, conn in list(self._conns.items()):
+            error = "timed out loading the model"
+            if conn.poll(timeout):
+                try:
+                    _, _, names, error = conn.recv()
+                except EOFError:
+                    error = f"exited with code {self._processes[worker_id].exitcode}"
+            if error:
+                self.stop()
+                raise RuntimeError(f"Inference worker {worker_id} failed to start: {error}")
+            self.names = names
+            self._ready.add(worker_id)
+
+        threading.Thread(target=self._collect, name="inference-results", daemon=True).start()
+        return self
+
+    def _spawn(self, worker_id):
+        conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self.model_path, self.backend, self._shm.name, self.slot_size, child_conn),
+            name=f"inference-worker-{worker_id}",
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        with self._lock:
+            self._processes[worker_id] = process
+            self._conns[worker_id] = conn
+            self._send_locks[worker_id] = threading.Lock()
+            self._assigned[worker_id] = set()
+
+    def stop(self):
+        """Stop the workers and release the shared memory."""
+        self._stopping = True
+        for worker_id, conn in list(self._conns.items()):
+            try:
+                with self._send_locks[worker_id]:
+                    conn.send(None)
+            except OSError:
+                pass
+        for process in self._processes.values():
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for conn in self._conns.values():
+            conn.close()
+        self._processes, self._conns = {}, {}
+        self._ready.clear()
+        self._retry_at.clear()
+        if self._shm is not None:
+            try:
+                self._shm.close()
+            except BufferError:
+                pass
+            self._shm.unlink()
+            self._shm = None
+
+    def _collect(self):
+        """
+        Resolve the future of every response and hand its slot back to the free list; about
+        once a second, check that the workers are still alive and respawn the ones whose
+        backoff has elapsed.
+        """
+        checked = time.monotonic()
+        while not self._stopping:
+            with self._lock:
+                conns = {conn: worker_id for worker_id, conn in self._conns.items()}
+            for conn in connection.wait(list(conns), timeout=1.0):
+                worker_id = conns[conn]
+                try:
+                    request_id, slot, probs, error = conn.recv()
+                except (EOFError, OSError):
+                    self._replace(worker_id, "exited")
+                    continue
+                if request_id == "ready":
+                    if error:
+                        self._replace(worker_id, f"failed to load the model: {error}")
+                    else:
+                        with self._lock:
+                            self._ready.add(worker_id)
+                            self._backoff.pop(worker_id, None)
+                    continue
+                self._resolve(request_id, RuntimeError(error) if error else probs)
+            if time.monotonic() - checked >= 1.0:
+                with self._lock:
+                    processes = list(self._processes.items())
+                for worker_id, process in processes:
+                    if not process.is_alive():
+                        self._replace(worker_id, "exited")
+                now = time.monotonic()
+                for worker_id, retry_at in list(self._retry_at.items()):
+                    if retry_at <= now and not self._stopping:
+                        del self._retry_at[worker_id]
+                        self._spawn(worker_id)
+                        self.restarts += 1
+                checked = now
+
+    def _resolve(self, request_id, outcome):
+        # Whoever removes the request from _pending returns its slot, so a slot is never freed twice.
+        with self._lock:
+            entry = self._pending.pop(request_id, None)
+            if entry is not None:
+                self._assigned[entry[3]].discard(request_id)
+        if entry is None:
+            return
+        future, shape, slot, _ = entry
+        self._free_slots.put(slot)
+        if isinstance(outcome, Exception):
+            future.set_exception(outcome)
+        else:
+            future.set_result(RemoteResult(self.names, outcome, shape[:2]))
+
+    def _replace(self, worker_id, reason):
+        """
+        Retire a dead or failed worker: close its pipe, fail its requests and schedule a
+        replacement. The first respawn is immediate; each one that fails before becoming
+        ready doubles the wait, up to a minute.
+        """
+        with self._lock:
+            if self._stopping or worker_id not in self._processes:
+                return
+            process = self._processes.pop(worker_id)
+            conn = self._conns.pop(worker_id)
+            self._ready.discard(worker_id)
+            lost = list(self._assigned[worker_id])
+            delay = self._backoff.get(worker_id, 0.0)
+            self._backoff[worker_id] = min(max(1.0, delay * 2), 60.0)
+            self._retry_at[worker_id] = time.monotonic() + delay
+        conn.close()
+        # A closed pipe can be seen before the exit; give the process a moment, then make sure.
+        process.join(timeout=1)
+        if process.is_alive():
+            process.terminate()
+        print(f"Inference worker {worker_id} {reason} (exit code {process.exitcode}), restarting it in {delay:.0f}s")
+        for request_id in lost:
+            self._resolve(request_id, RuntimeError(f"Inference worker {worker_id} died"))
+
+    def status(self):
+        """Worker health for the readiness probe: how many workers can take frames right now."""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "ready": len(self._ready),
+                "restarting": sorted(self._retry_at),
+                "restarts": self.restarts,
+            }
+
+    def submit(self, frame, timeout=None, **kwargs):
+        """
+        Copy one frame into a free slot and queue it on the least busy worker. Frames larger
+        than a slot are downscaled to fit; the classifier resizes its input far below that.
+        :param timeout: Seconds to wait for a free slot before raising TimeoutError.
+        """
+        orig_shape = frame.shape
+        if frame.dtype != np.uint8:
+            frame = frame.astype(np.uint8)
+        if frame.nbytes > self.slot_size:
+            scale = math.sqrt(self.slot_size / frame.nbytes)
+            size = (max(1, int(frame.shape[1] * scale)), max(1, int(frame.shape[0] * scale)))
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        try:
+            slot = self._free_slots.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No free inference slot within {timeout}s") from None
+        view = np.ndarray(frame.shape, dtype=frame.dtype, buffer=self._shm.buf, offset=slot * self.slot_size)
+        np.copyto(view, frame)
+
+        future = Future()
+        request_id = next(self._ids)
+        with self._lock:
+            if not self._ready:
+                self._free_slots.put(slot)
+                raise RuntimeError("No inference worker available")
+            worker_id = min(self._ready, key=lambda ready_id: len(self._assigned[ready_id]))
+            self._pending[request_id] = (future, orig_shape, slot, worker_id)
+            self._assigned[worker_id].add(request_id)
+            conn, send_lock = self._conns[worker_id], self._send_locks[worker_id]
+        try:
+            with send_lock:
+                conn.send((request_id, slot, frame.shape, frame.dtype.str, kwargs))
+        except OSError as e:
+            self._resolve(request_id, RuntimeError(f"Inference worker {worker_id} unreachable: {e}"))
+        return future
+
+    def predict(self, source, verbose=False, timeout=30, **kwargs):
+        """Classify one frame or a list of frames; the frames are spread over all workers."""
+        frames = source if isinstance(source, list) else [source]
+        futures = [self.submit(frame, timeout=timeout, **kwargs) for frame in frames]
+        return [future.result(timeout=timeout) for future in futures]
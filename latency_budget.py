@@ -0,0 +1,87 @@
+import threading
+
+
+def parse_sizes(value):
+    """Parse a comma separated list of input sizes ("224,160,128"); empty keeps the model default."""
+    sizes = [int(size) for size in value.split(",") if size.strip()] if value else []
+    return tuple(sizes) or (None,)
+
+
+class LatencyController:
+    """
+    Keeps classification inside a latency budget by walking a ladder of operating points,
+    cheapest last: first the input size is lowered step by step, then the inference stride
+    (classify every n-th batch) is raised. The measured latency is smoothed with an EWMA;
+    over budget the controller degrades one level, and once it has stayed below
+    `recover_ratio * budget` for `patience` measurements it recovers one level.
+    """
+
+    def __init__(self, budget=0.2, sizes=(None,), max_stride=8, alpha=0.3, recover_ratio=0.6, patience=20, settle=3):
+        self.budget = budget
+        self.levels = [(1, size) for size in sizes] + [(stride, sizes[-1]) for stride in range(2, max_stride + 1)]
+        self.alpha = alpha
+        self.recover_ratio = recover_ratio
+        self.patience = patience
+        self.settle = settle
+        self.level = 0
+        self.latency = None
+        self._lock = threading.Lock()
+        self._tick = 0
+        self._below = 0
+        self._since_change = 0
+        self.skipped = 0
+
+    @property
+    def stride(self):
+        return self.levels[self.level][0]
+
+    @property
+    def imgsz(self):
+        """Input size for the next predict call, None for the model default."""
+        return self.levels[self.level][1]
+
+    def should_run(self):
+        """True when this batch should be classified at the current stride."""
+        with self._lock:
+            self._tick += 1
+            if self._tick % self.stride:
+                self.skipped += 1
+                return False
+            return True
+
+    def observe(self, seconds):
+        """Record the latency of one classified batch and adjust the operating point."""
+        with self._lock:
+            self.latency = seconds if self.latency is None else self.alpha * seconds + (1 - self.alpha) * self.latency
+            self._since_change += 1
+            if self._since_change < self.settle:
+                return
+            if self.latency > self.budget:
+                self._below = 0
+                if self.level < len(self.levels) - 1:
+                    self._change(self.level + 1)
+            elif self.latency < self.recover_ratio * self.budget:
+                self._below += 1
+                if self._below >= self.patience and self.level > 0:
+                    self._change(self.level - 1)
+            else:
+                self._below = 0
+
+    def _change(self, level):
+        self.level = level
+        self._below = 0
+        self._since_change = 0
+        # Measurements taken at the old operating point say little about the new one.
+        self.latency = None
+
+    def status(self):
+        with self._lock:
+            return {
+                "budget_ms": round(self.budget * 1000, 1),
+                "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+                "level": self.level,
+                "max_level": len(self.levels) - 1,
+                "stride": self.stride,
+                "imgsz": self.imgsz,
+                "skipped_batches": self.skipped,
+            }
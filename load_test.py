@@ -0,0 +1,295 @@
+import argparse
+import http.client
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from benchmark import percentile
+
+DEFAULT_SOURCE = "virtual:TestFiles/*.mp4"
+APP_SCRIPT = "Real-Time-Detection.py"
+
+
+def http_json(url, data=None, timeout=5):
+    request = urllib.request.Request(url, data=json.dumps(data).encode() if data is not None else None,
+                                     headers={"Content-Type": "application/json"} if data is not None else {})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.status, json.loads(response.read() or b"null")
+
+
+def wait_until_up(base_url, process, timeout, require_ready):
+    """Wait for the app to answer (and, with `require_ready`, for /health to report ready)."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{APP_SCRIPT} exited with code {process.returncode}")
+        try:
+            status, _ = http_json(f"{base_url}/health")
+            if status == 200 or not require_ready:
+                return
+        except urllib.error.HTTPError as e:
+            if e.code == 503 and not require_ready:
+                return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"{APP_SCRIPT} not ready after {timeout}s")
+
+
+class StreamClient(threading.Thread):
+    """One MJPEG viewer: reads parts off /video_feed and records frame counts and frame ages."""
+
+    def __init__(self, host, port, path, stop):
+        super().__init__(daemon=True)
+        self.host, self.port, self.path, self.stop = host, port, path, stop
+        self.frames = 0
+        self.bytes = 0
+        self.ages_ms = []
+        self.error = None
+        self.started = self.finished = None
+
+    def run(self):
+        self.started = time.time()
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        try:
+            connection.request("GET", self.path)
+            response = connection.getresponse()
+            if response.status != 200:
+                raise RuntimeError(f"HTTP {response.status}")
+            while not self.stop.is_set():
+                line = response.fp.readline()
+                if not line:
+                    break
+                if not line.startswith(b"--"):
+                    continue
+                headers = {}
+                while True:
+                    line = response.fp.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if "content-length" not in headers:
+                    continue
+                data = response.fp.read(int(headers["content-length"]))
+                received = time.time()
+                self.frames += 1
+                self.bytes += len(data)
+                if "x-timestamp" in headers:
+                    self.ages_ms.append((received - float(headers["x-timestamp"])) * 1000)
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            self.finished = time.time()
+            connection.close()
+
+    def report(self):
+        seconds = max(1e-6, (self.finished or time.time()) - self.started)
+        return {
+            "path": self.path,
+            "frames": self.frames,
+            "fps": round(self.frames / seconds, 2),
+            "mbps": round(self.bytes * 8 / seconds / 1e6, 2),
+            "age_ms": {
+                "p50": round(percentile(self.ages_ms, 50), 1),
+                "p95": round(percentile(self.ages_ms, 95), 1),
+                "max": round(max(self.ages_ms), 1) if self.ages_ms else 0.0,
+            },
+            "error": self.error,
+        }
+
+
+class StatusPoller(threading.Thread):
+    """Polls a JSON endpoint at a fixed interval, like a dashboard without SSE."""
+
+    def __init__(self, url, interval, stop):
+        super().__init__(daemon=True)
+        self.url, self.interval, self.stop = url, interval, stop
+        self.latencies_ms = []
+        self.errors = 0
+
+    def run(self):
+        while not self.stop.is_set():
+            started = time.perf_counter()
+            try:
+                http_json(self.url)
+                self.latencies_ms.append((time.perf_counter() - started) * 1000)
+            except Exception:
+                self.errors += 1
+            self.stop.wait(max(0.0, self.interval - (time.perf_counter() - started)))
+
+
+class ProcessSampler(threading.Thread):
+    """Samples CPU% and RSS of the server process, via psutil when installed, else /proc."""
+
+    def __init__(self, pid, stop, interval=1.0):
+        super().__init__(daemon=True)
+        self.pid, self.stop, self.interval = pid, stop, interval
+        self.cpu = []
+        self.rss_mb = []
+
+    def _read(self):
+        try:
+            import psutil
+        except ImportError:
+            psutil = None
+        if psutil is not None:
+            process = psutil.Process(self.pid)
+            times = process.cpu_times()
+            return times.user + times.system, process.memory_info().rss / 1e6
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        cpu_seconds = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        with open(f"/proc/{self.pid}/status") as f:
+            rss_kb = int(re.search(r"VmRSS:\s+(\d+)", f.read()).group(1))
+        return cpu_seconds, rss_kb / 1000
+
+    def run(self):
+        try:
+            previous_cpu, _ = self._read()
+            previous_time = time.monotonic()
+            while not self.stop.wait(self.interval):
+                cpu_seconds, rss_mb = self._read()
+                now = time.monotonic()
+                self.cpu.append(100 * (cpu_seconds - previous_cpu) / (now - previous_time))
+                self.rss_mb.append(rss_mb)
+                previous_cpu, previous_time = cpu_seconds, now
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    def report(self):
+        def stats(values):
+            return {"mean": round(sum(values) / len(values), 1) if values else 0.0,
+                    "max": round(max(values), 1) if values else 0.0}
+        return {"cpu_percent": stats(self.cpu), "rss_mb": stats(self.rss_mb)}
+
+
+def scrape_counters(base_url, prefixes=("fallsafe_alerts_total", "fallsafe_notifications_total",
+                                        "fallsafe_frames_", "fallsafe_inference_")):
+    """Pick the alert, frame and inference series out of the Prometheus text on /metrics."""
+    with urllib.request.urlopen(f"{base_url}/metrics", timeout=5) as response:
+        text = response.read().decode()
+    counters = {}
+    for line in text.splitlines():
+        if line.startswith(prefixes):
+            name, _, value = line.rpartition(" ")
+            counters[name] = float(value)
+    return counters
+
+
+def run_load_test(args):
+    base_url = f"http://{args.host}:{args.port}"
+    env = dict(os.environ, CAMERA_SOURCES=args.source, PORT=str(args.port), FRAME_LOGGING="0",
+               ALERT_CHANNELS=args.alert_channels)
+    process = subprocess.Popen([sys.executable, APP_SCRIPT], env=env,
+                               stdout=subprocess.DEVNULL if args.quiet else None,
+                               stderr=subprocess.DEVNULL if args.quiet else None)
+    stop = threading.Event()
+    try:
+        started = time.time()
+        wait_until_up(base_url, process, args.startup_timeout, args.require_ready)
+        startup_seconds = time.time() - started
+        if args.alerts:
+            http_json(f"{base_url}/send_details",
+                      {"email": args.alert_email, "phone": args.alert_phone, "conf": args.conf})
+
+        query = f"?{args.tier}" if args.tier else ""
+        clients = [StreamClient(args.host, args.port, f"/video_feed{query}", stop) for _ in range(args.clients)]
+        pollers = [StatusPoller(f"{base_url}/fall_status", args.poll_interval, stop) for _ in range(args.pollers)]
+        sampler = ProcessSampler(process.pid, stop)
+        for thread in clients + pollers + [sampler]:
+            thread.start()
+        time.sleep(args.duration)
+        stop.set()
+        for thread in clients + pollers + [sampler]:
+            thread.join(timeout=5)
+
+        client_reports = [client.report() for client in clients]
+        ages = [age for client in clients for age in client.ages_ms]
+        poll_latencies = [latency for poller in pollers for latency in poller.latencies_ms]
+        return {
+            "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+            "startup_seconds": round(startup_seconds, 2),
+            "summary": {
+                "clients": len(clients),
+                "client_errors": sum(report["error"] is not None for report in client_reports),
+                "mean_client_fps": round(sum(report["fps"] for report in client_reports) / max(1, len(clients)), 2),
+                "min_client_fps": min((report["fps"] for report in client_reports), default=0.0),
+                "frame_age_p50_ms": round(percentile(ages, 50), 1),
+                "frame_age_p95_ms": round(percentile(ages, 95), 1),
+                "poll_p95_ms": round(percentile(poll_latencies, 95), 1),
+                "poll_errors": sum(poller.errors for poller in pollers),
+            },
+            "server": sampler.report(),
+            "counters": scrape_counters(base_url),
+            "clients": client_reports,
+        }
+    finally:
+        stop.set()
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def compare_to_baseline(report, baseline, tolerance=0.10):
+    """List summary figures that got worse than the baseline by more than `tolerance`."""
+    regressions = []
+    higher_is_better = {"mean_client_fps", "min_client_fps"}
+    for key, value in report["summary"].items():
+        old = baseline.get("summary", {}).get(key)
+        if not isinstance(old, (int, float)) or not old:
+            continue
+        change = (old - value) / old if key in higher_is_better else (value - old) / old
+        if change > tolerance:
+            regressions.append(f"{key}: {old} -> {value} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end load test of the real-time server with virtual cameras.")
+    parser.add_argument("--source", default=DEFAULT_SOURCE, help="CAMERA_SOURCES for the server")
+    parser.add_argument("--clients", type=int, default=4, help="Concurrent /video_feed readers")
+    parser.add_argument("--pollers", type=int, default=2, help="Concurrent /fall_status pollers")
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--tier", default="", help="Stream tier query for the readers, e.g. w=640&q=60")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of load after startup")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--startup-timeout", type=float, default=300)
+    parser.add_argument("--require-ready", action="store_true", help="Wait for the model before loading the server")
+    parser.add_argument("--alerts", action="store_true", help="Enable alert processing via /send_details")
+    parser.add_argument("--alert-channels", default="console", help="ALERT_CHANNELS for the server")
+    parser.add_argument("--alert-email", default="loadtest@example.com")
+    parser.add_argument("--alert-phone", default="+10000000000")
+    parser.add_argument("--conf", type=float, default=0.5)
+    parser.add_argument("--quiet", action="store_true", help="Hide the server's output")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Earlier report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed regression (fraction)")
+    args = parser.parse_args()
+
+    report = run_load_test(args)
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
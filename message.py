@@ -1,18 +1,32 @@
-def send_sms_alert(tonumber):
+import os
+import threading
+
+from dotenv import load_dotenv
+load_dotenv()
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def twilio_client(account_sid=None, auth_token=None):
+    """Twilio client for the given (or environment) credentials, built once and reused."""
+    account_sid = account_sid or os.getenv('TWILIO_ACCOUNT_SID')
+    auth_token = auth_token or os.getenv('TWILIO_AUTH_TOKEN')
+    key = (account_sid, auth_token)
+    with _clients_lock:
+        if key not in _clients:
+            from twilio.rest import Client
+            _clients[key] = Client(account_sid, auth_token)
+        return _clients[key]
+
+
+def send_sms_alert(tonumber, message_body='Fall Detected - Check Email for more information', raise_on_error=False):
     try:
-        from twilio.rest import Client
-        from dotenv import load_dotenv
-        import os
-        load_dotenv()
-
-        account_sid = os.getenv('TWILIO_ACCOUNT_SID')
-        auth_token = os.getenv('TWILIO_AUTH_TOKEN')
-        client = Client(account_sid, auth_token)
-        
+        client = twilio_client()
+
         to_number = tonumber
         from_number = os.getenv('SENDER_NUMBER')
-        message_body = 'Fall Detected - Check Email for more information'
-        
+
         message = client.messages.create(
             from_=from_number,
             body=message_body,
@@ -22,7 +36,9 @@ def send_sms_alert(tonumber):
         return True
     except Exception as e:
         print(f"Error sending SMS: {e}")
+        if raise_on_error:
+            raise
         return False
 
 # if __name__ == "__main__":
-#     send_sms_alert()
\ No newline at end of file
+#     send_sms_alert()
@@ -0,0 +1,71 @@
+import threading
+import cv2
+
+
+class MotionGate:
+    """
+    Cheap pre-stage deciding whether a frame is worth classifying. Frames are downscaled to a
+    small grayscale thumbnail and compared to the last frame that was classified; the model
+    only runs when the fraction of changed pixels passes `threshold`. A classification is
+    still forced every `max_skip` frames so a static scene never keeps a stale result forever.
+    """
+
+    def __init__(self, threshold=0.01, pixel_threshold=25, width=160, max_skip=30):
+        self.threshold = threshold
+        self.pixel_threshold = pixel_threshold
+        self.width = width
+        self.max_skip = max_skip
+        self._reference = None
+        self._skipped_in_row = 0
+        self._lock = threading.Lock()
+        self.frames_total = 0
+        self.frames_inferred = 0
+        self.frames_skipped = 0
+        self.last_motion = 0.0
+
+    def _thumbnail(self, frame):
+        height, width = frame.shape[:2]
+        size = (self.width, max(1, int(height * self.width / width)))
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def should_infer(self, frame):
+        """
+        Return True if the classifier should run on this frame, False to reuse the last result.
+        """
+        with self._lock:
+            self.frames_total += 1
+            if self.threshold <= 0:
+                self.frames_inferred += 1
+                return True
+
+            thumbnail = self._thumbnail(frame)
+            if self._reference is None or self._reference.shape != thumbnail.shape:
+                motion = 1.0
+            else:
+                diff = cv2.absdiff(thumbnail, self._reference)
+                _, mask = cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)
+                motion = cv2.countNonZero(mask) / mask.size
+            self.last_motion = motion
+
+            if motion >= self.threshold or self._skipped_in_row >= self.max_skip:
+                self._reference = thumbnail
+                self._skipped_in_row = 0
+                self.frames_inferred += 1
+                return True
+
+            self._skipped_in_row += 1
+            self.frames_skipped += 1
+            return False
+
+    def stats(self):
+        """Counters describing how much inference the gate has saved."""
+        with self._lock:
+            return {
+                "frames_total": self.frames_total,
+                "frames_inferred": self.frames_inferred,
+                "frames_skipped": self.frames_skipped,
+                "skip_ratio": self.frames_skipped / self.frames_total if self.frames_total else 0.0,
+                "last_motion": self.last_motion,
+            }
@@ -0,0 +1,200 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from metrics import REGISTRY
+
+NOTIFICATIONS = REGISTRY.counter("fallsafe_notifications_total", "Notifications by channel and outcome.")
+NOTIFY_SECONDS = REGISTRY.histogram("fallsafe_notify_seconds", "Time until every channel of one alert finished or timed out.")
+
+
+class TokenBucket:
+    """Allows bursts of up to `capacity` sends, refilled at `rate` tokens per second."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, tokens=1):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < tokens:
+                return False
+            self._tokens -= tokens
+            return True
+
+
+class Channel:
+    """
+    One way of delivering an alert. Subclasses implement `send(alert)` and raise on failure;
+    `alert` is a dict with label, confidence_score, receiver_email, phone and frame_path or
+    frame_bytes.
+    """
+
+    name = "channel"
+    default_rate_per_minute = None
+
+    def __init__(self, timeout=10.0, rate_per_minute=None, burst=None):
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate_per_minute / 60.0, burst or max(1, int(rate_per_minute))) if rate_per_minute else None
+
+    def send(self, alert):
+        raise NotImplementedError
+
+
+class EmailChannel(Channel):
+    name = "email"
+
+    def __init__(self, digest=False, **kwargs):
+        super().__init__(**kwargs)
+        self.digest = digest
+
+    def send(self, alert):
+        from Email import get_mailer
+
+        if not alert.get("receiver_email"):
+            return "skipped"
+        mailer = get_mailer()
+        if self.digest:
+            mailer.queue_alert(alert["label"], alert["confidence_score"], alert["receiver_email"],
+                               alert.get("frame_path"), alert.get("frame_bytes"))
+            return "queued"
+        mailer.send_alert(alert["label"], alert["confidence_score"], alert["receiver_email"],
+                          alert.get("frame_path"), alert.get("frame_bytes"))
+        return "sent"
+
+
+class SmsChannel(Channel):
+    name = "sms"
+    default_rate_per_minute = 2
+
+    def send(self, alert):
+        from message import send_sms_alert
+
+        if not alert.get("phone"):
+            return "skipped"
+        send_sms_alert(alert["phone"], _text(alert), raise_on_error=True)
+        return "sent"
+
+
+class WhatsAppChannel(Channel):
+    name = "whatsapp"
+    default_rate_per_minute = 2
+
+    def send(self, alert):
+        from whatsapp import send_whatsapp_alert
+
+        if not alert.get("phone"):
+            return "skipped"
+        send_whatsapp_alert(alert["phone"], _text(alert), raise_on_error=True)
+        return "sent"
+
+
+class ConsoleChannel(Channel):
+    """Prints the alert instead of delivering it, for development without credentials."""
+
+    name = "console"
+
+    def send(self, alert):
+        print(f"[alert] {_text(alert)}")
+        return "sent"
+
+
+CHANNELS = {
+    "email": EmailChannel,
+    "sms": SmsChannel,
+    "whatsapp": WhatsAppChannel,
+    "console": ConsoleChannel,
+}
+
+
+def _text(alert):
+    return f"{alert.get('label', 'Fall Detected')} ({alert.get('confidence_score', 0):.2f}) - Check Email for more information"
+
+
+class Notifier:
+    """
+    Fans one alert out to every channel concurrently. Each channel has its own timeout and
+    token-bucket rate limit, so a slow or throttled channel never delays the others, and
+    `notify()` returns a per-channel summary instead of raising.
+    """
+
+    def __init__(self, channels, max_workers=None):
+        self.channels = list(channels)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or max(4, 2 * len(self.channels)),
+                                            thread_name_prefix="notifier")
+        self._dispatch = ThreadPoolExecutor(max_workers=2, thread_name_prefix="notifier-dispatch")
+
+    def _send(self, channel, alert):
+        started = time.perf_counter()
+        status = channel.send(alert) or "sent"
+        return status, time.perf_counter() - started
+
+    def notify(self, **alert):
+        """
+        Deliver one alert on every channel.
+        :return: Dict of channel name to {"status", "seconds", "error"}, status being sent, queued,
+                 skipped, rate_limited, timeout or failed.
+        """
+        started = time.perf_counter()
+        futures = {}
+        summary = {}
+        for channel in self.channels:
+            if channel.bucket is not None and not channel.bucket.try_acquire():
+                summary[channel.name] = {"status": "rate_limited", "seconds": 0.0, "error": None}
+                continue
+            futures[channel] = self._executor.submit(self._send, channel, alert)
+
+        for channel, future in futures.items():
+            remaining = max(0.0, started + channel.timeout - time.perf_counter())
+            try:
+                status, seconds = future.result(timeout=remaining)
+                summary[channel.name] = {"status": status, "seconds": round(seconds, 3), "error": None}
+            except FutureTimeout:
+                summary[channel.name] = {"status": "timeout", "seconds": channel.timeout, "error": None}
+            except Exception as e:
+                summary[channel.name] = {"status": "failed", "seconds": round(time.perf_counter() - started, 3),
+                                         "error": str(e)}
+
+        for name, result in summary.items():
+            NOTIFICATIONS.inc(channel=name, status=result["status"])
+        NOTIFY_SECONDS.observe(time.perf_counter() - started)
+        return summary
+
+    def notify_async(self, **alert):
+        """Run `notify()` in the background; returns a Future of the summary."""
+        return self._dispatch.submit(self.notify, **alert)
+
+    def close(self, wait=False):
+        """Stop accepting alerts; with `wait`, alerts already submitted are delivered first."""
+        self._dispatch.shutdown(wait=wait)
+        self._executor.shutdown(wait=wait)
+
+
+def notifier_from_env(default_channels="email", **channel_kwargs):
+    """
+    Build a Notifier from ALERT_CHANNELS (comma separated: email, sms, whatsapp, console), with
+    per-channel <NAME>_TIMEOUT seconds and <NAME>_RATE_PER_MIN limits (0 disables the limit).
+    :param channel_kwargs: Extra constructor arguments keyed by channel name, e.g. email={"digest": True}.
+    """
+    channels = []
+    for name in os.getenv("ALERT_CHANNELS", default_channels).split(","):
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name not in CHANNELS:
+            raise ValueError(f"Unknown alert channel '{name}', expected one of {', '.join(CHANNELS)}")
+        prefix = name.upper()
+        rate = float(os.getenv(f"{prefix}_RATE_PER_MIN", CHANNELS[name].default_rate_per_minute or 0))
+        channels.append(CHANNELS[name](
+            timeout=float(os.getenv(f"{prefix}_TIMEOUT", 10)),
+            rate_per_minute=rate or None,
+            **channel_kwargs.get(name, {})
+        ))
+    return Notifier(channels)
@@ -0,0 +1,233 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+
+from detection_store import iter_chunks
+
+DEFAULT_CACHE_DIR = os.path.join("cache", "results")
+# Same columns as a DetectionStore chunk: one row per detection, tagged with its video frame index.
+ARRAYS = ("frame", "xywh", "class_id", "confidence")
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def frame_peaks(counts, class_ids, confidences, fall_ids, threshold):
+    """
+    Highest fall confidence above `threshold` in every frame, 0 for frames without a fall.
+    :param counts: Number of detection rows of each frame, the rows being concatenated.
+    """
+    scores = np.where(np.isin(class_ids, fall_ids) & (confidences > threshold), confidences, 0.0)
+    peaks = np.zeros(len(counts), np.float32)
+    nonempty = counts > 0
+    if nonempty.any():
+        offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        peaks[nonempty] = np.maximum.reduceat(scores, offsets[nonempty])
+    return peaks
+
+
+def fall_events(peaks):
+    """Runs of consecutive fall frames as dicts with start_frame, end_frame and peak_confidence."""
+    falling = np.concatenate([[False], peaks > 0, [False]])
+    edges = np.flatnonzero(np.diff(falling.astype(np.int8)))
+    return [
+        {"start_frame": int(start), "end_frame": int(end - 1), "peak_confidence": round(float(peaks[start:end].max()), 4)}
+        for start, end in zip(edges[::2], edges[1::2])
+    ]
+
+
+def frame_offsets(frame):
+    """Row offset of the first detection of every frame in a per-row frame index column."""
+    return np.flatnonzero(np.diff(frame, prepend=-1)) if len(frame) else np.empty(0, np.int64)
+
+
+def detection_events(frame, class_id, confidence, fall_ids, threshold):
+    """
+    Fall events of a run of analysed frames, given as per-detection rows. Frames are
+    consecutive when they were analysed one after the other, whatever the sampling step;
+    start_frame and end_frame are video frame indices.
+    """
+    offsets = frame_offsets(frame)
+    counts = np.diff(np.append(offsets, len(frame)))
+    events = fall_events(frame_peaks(counts, class_id, confidence, fall_ids, threshold))
+    for event in events:
+        event["start_frame"] = int(frame[offsets[event["start_frame"]]])
+        event["end_frame"] = int(frame[offsets[event["end_frame"]]])
+    return events
+
+
+def store_arrays(store_path):
+    """
+    Read a finished DetectionStore back chunk by chunk into one array per column, so results
+    can be cached without keeping per-frame arrays of the whole video around while it runs.
+    """
+    _, chunks = iter_chunks(store_path)
+    columns = {name: [] for name in ARRAYS}
+    for chunk in chunks:
+        for name in ARRAYS:
+            columns[name].append(chunk[name])
+    empty = {"frame": np.empty(0, np.int64), "xywh": np.empty((0, 4), np.float32),
+             "class_id": np.empty(0, np.int16), "confidence": np.empty(0, np.float32)}
+    return {name: np.concatenate(parts) if parts else empty[name] for name, parts in columns.items()}
+
+
+class CachedResult:
+    """Detection rows of one cached analysis plus its metadata."""
+
+    def __init__(self, key, path, meta, arrays):
+        self.key = key
+        self.path = path
+        self.meta = meta
+        self.arrays = arrays
+
+    @property
+    def frames(self):
+        """Number of analysed frames, including any without detections."""
+        return self.meta.get("frames", len(frame_offsets(self.arrays["frame"])))
+
+    def iter_frames(self):
+        """Yield (frame_index, xywh, class_ids, confidences) for every frame with detections, in order."""
+        frame = self.arrays["frame"]
+        offsets = np.append(frame_offsets(frame), len(frame))
+        for start, end in zip(offsets[:-1], offsets[1:]):
+            yield (int(frame[start]), self.arrays["xywh"][start:end], self.arrays["class_id"][start:end],
+                   self.arrays["confidence"][start:end])
+
+    def events(self, fall_ids, threshold):
+        arrays = self.arrays
+        return detection_events(arrays["frame"], arrays["class_id"], arrays["confidence"], fall_ids, threshold)
+
+
+class ResultCache:
+    """
+    On-disk cache of analysis results keyed by the content of the input file, the model
+    weights and the settings that change what the model sees (sampling rate, backend).
+    The fall threshold is not part of the key: results are stored with the confidence they
+    were produced at and serve any later threshold at or above it.
+    Entries are evicted least recently used first once the cache exceeds `max_bytes`.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=2 << 30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._digests_path = os.path.join(directory, "file_digests.json")
+
+    def file_digest(self, path):
+        """
+        Content hash of `path`, remembered by path, size and modification time so unchanged
+        files are not read again.
+        """
+        stat = os.stat(path)
+        memo_key = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+        with self._lock:
+            digests = self._read_json(self._digests_path, {})
+        if memo_key in digests:
+            return digests[memo_key]
+        digest = file_digest(path)
+        with self._lock:
+            digests = self._read_json(self._digests_path, {})
+            digests[memo_key] = digest
+            self._write_json(self._digests_path, digests)
+        return digest
+
+    def key(self, path, model_hash, settings):
+        """Cache key of analysing `path` with the given model and settings dict."""
+        payload = json.dumps({"file": self.file_digest(path), "model": model_hash, "settings": settings}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+    def _entry(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key, threshold):
+        """
+        Return the cached result for `key` if it can serve `threshold`, None otherwise. A hit
+        marks the entry as recently used.
+        """
+        path = self._entry(key)
+        meta = self._read_json(os.path.join(path, "meta.json"), None)
+        if meta is None or threshold < meta["inference_conf"]:
+            return None
+        try:
+            with np.load(os.path.join(path, "arrays.npz")) as data:
+                arrays = {name: data[name] for name in ARRAYS}
+        except (OSError, KeyError, ValueError):
+            return None
+        meta["last_used"] = time.time()
+        self._write_json(os.path.join(path, "meta.json"), meta)
+        return CachedResult(key, path, meta, arrays)
+
+    def put(self, key, frame, xywh, class_id, confidence, meta):
+        """
+        Store the detection rows of one analysis. The entry is written to a temporary
+        directory and renamed into place, so a crash never leaves a half-written entry.
+        :param meta: JSON-serialisable metadata; must contain "inference_conf".
+        """
+        path = self._entry(key)
+        tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        os.makedirs(tmp_path, exist_ok=True)
+        np.savez(os.path.join(tmp_path, "arrays.npz"), frame=np.asarray(frame, np.int64),
+                 xywh=np.asarray(xywh, np.float32).reshape(-1, 4), class_id=np.asarray(class_id, np.int16),
+                 confidence=np.asarray(confidence, np.float32))
+        meta = dict(meta, created=time.time(), last_used=time.time())
+        self._write_json(os.path.join(tmp_path, "meta.json"), meta)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+        self.evict(keep=key)
+
+    def update_meta(self, cached, **fields):
+        cached.meta.update(fields)
+        self._write_json(os.path.join(cached.path, "meta.json"), cached.meta)
+
+    def evict(self, keep=None):
+        """
+        Delete least recently used entries until the cache fits `max_bytes`; returns the count.
+        :param keep: Key of an entry that is never evicted, e.g. the one just written.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            path = self._entry(name)
+            meta = self._read_json(os.path.join(path, "meta.json"), None) if os.path.isdir(path) else None
+            if meta is None:
+                continue
+            size = sum(entry.stat().st_size for entry in os.scandir(path))
+            entries.append((meta.get("last_used", 0), size, name))
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            path = self._entry(name)
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            evicted += 1
+        return evicted
+
+    @staticmethod
+    def _read_json(path, default):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return default
+
+    @staticmethod
+    def _write_json(path, data):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
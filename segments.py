@@ -0,0 +1,226 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import uuid
+from concurrent.futures import wait
+
+import cv2
+import numpy as np
+
+from detection import frame_arrays
+from video_io import iter_sampled_frames, video_fps
+from worker_pool import create_pool, worker_model
+
+
+def probe_keyframes(video_path):
+    """
+    Timestamps (seconds) of the keyframes of the first video stream, read from the packet
+    index by ffprobe without decoding. Returns None when ffprobe is not installed.
+    """
+    if shutil.which("ffprobe") is None:
+        return None
+    try:
+        output = subprocess.run(
+            ["ffprobe", "-v", "error", "-select_streams", "v:0", "-show_entries", "packet=pts_time,flags",
+             "-of", "csv=print_section=0", video_path],
+            capture_output=True, text=True, check=True
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    keyframes = []
+    for line in output.splitlines():
+        pts_time, _, flags = line.partition(",")
+        if "K" in flags and pts_time not in ("", "N/A"):
+            keyframes.append(float(pts_time))
+    return sorted(keyframes) or None
+
+
+def plan_segments(video_path, workers, min_segment_seconds=30.0, segments_per_worker=2):
+    """
+    Split a video into contiguous frame ranges for parallel decoding. Boundaries are moved to
+    the nearest keyframe when ffprobe is available, so no worker decodes frames it then
+    throws away while seeking.
+    :return: List of (start_frame, end_frame) tuples, end_frame being None for the last one.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise FileNotFoundError(f"Could not open video file: {video_path}")
+    fps = video_fps(cap)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+
+    count = min(workers * segments_per_worker, int(total_frames / fps // min_segment_seconds))
+    if count <= 1:
+        return [(0, None)]
+    boundaries = [round(total_frames * i / count) for i in range(1, count)]
+
+    keyframes = probe_keyframes(video_path)
+    if keyframes:
+        keyframe_indices = np.round(np.array(keyframes) * fps).astype(int)
+        snapped = keyframe_indices[np.abs(keyframe_indices[:, None] - np.array(boundaries)[None, :]).argmin(axis=0)]
+        boundaries = sorted(set(int(b) for b in snapped if 0 < b < total_frames))
+
+    starts = [0] + boundaries
+    return list(zip(starts, boundaries + [None]))
+
+
+def classify_segment(video_path, start_frame, end_frame, conf, target_fps, fall_class="fall", cancel_path=None):
+    """
+    Worker task: decode and classify one segment.
+    :param cancel_path: The segment stops after the current frame once this file exists.
+    :return: Dict with the per-frame indices and timestamps, the concatenated detection arrays
+             with the number of rows of each frame, and the fall events seen in the segment,
+             each with a JPEG thumbnail of its first frame. None when the segment was cancelled.
+    """
+    model = worker_model()
+    fall_ids = [idx for idx, name in model.names.items() if name == fall_class]
+    frames, times, counts, xywh_rows, class_rows, conf_rows, events = [], [], [], [], [], [], []
+    event = None
+    for frame_index, timestamp, frame in iter_sampled_frames(video_path, target_fps, start_frame, end_frame):
+        if cancel_path is not None and os.path.exists(cancel_path):
+            return None
+        result = model.predict(source=frame, conf=conf, verbose=False)[0]
+        xywh, class_ids, confidences = frame_arrays(result)
+        frames.append(frame_index)
+        times.append(timestamp)
+        counts.append(len(class_ids))
+        xywh_rows.append(xywh)
+        class_rows.append(class_ids)
+        conf_rows.append(confidences)
+
+        fall_mask = np.isin(class_ids, fall_ids) & (confidences > conf)
+        if fall_mask.any():
+            peak = float(confidences[fall_mask].max())
+            if event is None:
+                success, buffer = cv2.imencode(".jpg", frame)
+                event = {"start_frame": frame_index, "start_time": timestamp, "peak_confidence": peak,
+                         "thumbnail": buffer.tobytes() if success else None}
+                events.append(event)
+            event.update(end_frame=frame_index, end_time=timestamp,
+                         peak_confidence=max(event["peak_confidence"], peak))
+        else:
+            event = None
+
+    return {
+        "start_frame": start_frame,
+        "frames": np.array(frames, np.int64),
+        "times": np.array(times, np.float64),
+        "counts": np.array(counts, np.int32),
+        "xywh": np.concatenate(xywh_rows) if xywh_rows else np.empty((0, 4), np.float32),
+        "class_ids": np.concatenate(class_rows) if class_rows else np.empty(0, np.int16),
+        "confidences": np.concatenate(conf_rows) if conf_rows else np.empty(0, np.float32),
+        "events": events,
+    }
+
+
+def stitch_events(segment_results, max_gap_frames):
+    """
+    Merge the per-segment fall events into one list, joining an event that ends a segment
+    with one that starts the next when no more than `max_gap_frames` separate them.
+    """
+    stitched = []
+    for segment in segment_results:
+        for event in segment["events"]:
+            previous = stitched[-1] if stitched else None
+            if previous is not None and event["start_frame"] - previous["end_frame"] <= max_gap_frames:
+                previous.update(end_frame=event["end_frame"], end_time=event["end_time"],
+                                peak_confidence=max(previous["peak_confidence"], event["peak_confidence"]))
+            else:
+                stitched.append(dict(event))
+    return stitched
+
+
+def iter_parallel_results(pool, video_path, segments, conf, target_fps=None, on_segment=None, cancel=None):
+    """
+    Classify the segments of a video on `pool` and yield the per-frame results in frame order,
+    as soon as every earlier segment is done.
+    :param segments: Frame ranges from `plan_segments()`.
+    :param on_segment: Called with each segment result, in order, before its frames are yielded.
+    :param cancel: threading.Event; once set, no more frames are yielded. Segments that are
+                   already running see it through a marker file and stop after their current
+                   frame, so a cancelled run does not keep the pool busy.
+    :return: Generator of (frame_index, timestamp, xywh, class_ids, confidences, thumbnail) tuples,
+             thumbnail being the JPEG of the first frame of a segment-local fall event or None.
+    """
+    cancel_path = os.path.join(tempfile.gettempdir(), f"fallsafe-cancel-{uuid.uuid4().hex}")
+    futures = [pool.submit(classify_segment, video_path, start, end, conf, target_fps, cancel_path=cancel_path)
+               for start, end in segments]
+    try:
+        for future in futures:
+            while not wait([future], timeout=0.2).done:
+                if cancel is not None and cancel.is_set():
+                    return
+            segment = future.result()
+            if segment is None:
+                return
+            if on_segment is not None:
+                on_segment(segment)
+            thumbnails = {event["start_frame"]: event["thumbnail"] for event in segment["events"]}
+            offsets = np.concatenate([[0], np.cumsum(segment["counts"])])
+            for i, frame_index in enumerate(segment["frames"]):
+                if cancel is not None and cancel.is_set():
+                    return
+                rows = slice(offsets[i], offsets[i + 1])
+                yield (int(frame_index), float(segment["times"][i]), segment["xywh"][rows],
+                       segment["class_ids"][rows], segment["confidences"][rows], thumbnails.get(int(frame_index)))
+    finally:
+        for future in futures:
+            future.cancel()
+        if not all(future.done() for future in futures):
+            # Stop the segments still running and wait for them, so the next run gets idle workers
+            open(cancel_path, "w").close()
+            wait(futures)
+        if os.path.exists(cancel_path):
+            os.remove(cancel_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify one long video on all cores and report its fall events.")
+    parser.add_argument("video")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--conf", type=float, default=0.5, help="Fall confidence threshold")
+    parser.add_argument("--target-fps", type=float, default=30, help="Sample the video at this frame rate")
+    parser.add_argument("--min-segment-seconds", type=float, default=30)
+    parser.add_argument("--model", default="model/model.pt")
+    parser.add_argument("--backend", default=None, help="Inference backend, see backends.py")
+    parser.add_argument("--output", default=None, help="Write the summary JSON here instead of stdout")
+    args = parser.parse_args()
+
+    started = time.time()
+    segments = plan_segments(args.video, args.workers, args.min_segment_seconds)
+    cap = cv2.VideoCapture(args.video)
+    fps = video_fps(cap)
+    cap.release()
+    step = fps / args.target_fps if args.target_fps and args.target_fps < fps else 1.0
+
+    segment_events = []
+    frames = 0
+    with create_pool(args.model, args.backend, min(args.workers, len(segments))) as pool:
+        for _ in iter_parallel_results(pool, args.video, segments, args.conf, args.target_fps,
+                                       lambda segment: segment_events.append({"events": segment["events"]})):
+            frames += 1
+
+    events = stitch_events(segment_events, max_gap_frames=int(np.ceil(step)) + 1)
+    for event in events:
+        event.pop("thumbnail", None)
+    summary = {
+        "file": args.video,
+        "workers": args.workers,
+        "segments": [[start, end] for start, end in segments],
+        "frames": frames,
+        "events": events,
+        "seconds": round(time.time() - started, 2),
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+    else:
+        print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
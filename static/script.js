@@ -29,44 +29,70 @@ document.getElementById("saveDetails").addEventListener("click", () => {
   }
 });
 
-function updateFallStatus() {
+function renderFallStatus(status) {
   const email = document.getElementById("recipientEmail").value.trim();
   const phone = document.getElementById("phoneNumber").value.trim();
   const conf = document.getElementById("confidence").value.trim();
+  document.getElementById("fallStatus").innerText = status
+    ? "Fall Detected"
+    : "No Fall Detected";
+  document.getElementById("alertMessage").style.display = status
+    ? "block"
+    : "none";
+  document.getElementById("SavedEmail").style.display = status
+    ? "block"
+    : "none";
+  document.getElementById("SavePhone").style.display = status
+    ? "block"
+    : "none";
+  document.getElementById("SavedConf").style.display = status
+    ? "block"
+    : "none";
+  document.getElementById("SavedEmail").innerText = status
+    ? email
+    : "Could not get Data";
+  document.getElementById("SavePhone").innerText = status
+    ? phone
+    : "Could not get Data";
+  document.getElementById("SavedConf").innerText = status
+    ? conf
+    : "Could not get Data";
+  // Use class "re" to show/hide input groups.
+  let reElements = document.getElementsByClassName("re");
+  for (let el of reElements) {
+    el.style.display = status ? "none" : "block";
+  }
+}
+
+function updateFallStatus() {
   fetch("/fall_status")
     .then((response) => response.json())
-    .then((data) => {
-      document.getElementById("fallStatus").innerText = data.status
-        ? "Fall Detected"
-        : "No Fall Detected";
-      document.getElementById("alertMessage").style.display = data.status
-        ? "block"
-        : "none";
-      document.getElementById("SavedEmail").style.display = data.status
-        ? "block"
-        : "none";
-      document.getElementById("SavePhone").style.display = data.status
-        ? "block"
-        : "none";
-      document.getElementById("SavedConf").style.display = data.status
-        ? "block"
-        : "none";
-      document.getElementById("SavedEmail").innerText = data.status
-        ? email
-        : "Could not get Data";
-      document.getElementById("SavePhone").innerText = data.status
-        ? phone
-        : "Could not get Data";
-      document.getElementById("SavedConf").innerText = data.status
-        ? conf
-        : "Could not get Data";
-      // Use class "re" to show/hide input groups.
-      let reElements = document.getElementsByClassName("re");
-      for (let el of reElements) {
-        el.style.display = data.status ? "none" : "block";
-      }
-    })
+    .then((data) => renderFallStatus(data.status))
     .catch((error) => console.error("Error updating fall status:", error));
 }
 
-setInterval(updateFallStatus, 500);
+function subscribeFallStatus() {
+  // Status changes are pushed by the server; fall back to polling only
+  // for browsers without Server-Sent Events support.
+  if (!window.EventSource) {
+    setInterval(updateFallStatus, 500);
+    return;
+  }
+  const source = new EventSource("/events");
+  const onStatus = (event) => renderFallStatus(JSON.parse(event.data).status);
+  source.addEventListener("status", onStatus);
+  source.addEventListener("fall_started", onStatus);
+  source.addEventListener("fall_cleared", onStatus);
+  source.addEventListener("alert_sent", (event) => {
+    const data = JSON.parse(event.data);
+    const channels = Object.entries(data.channels || {})
+      .map(([name, result]) => `${name} ${result.status}`)
+      .join(", ");
+    console.log(
+      `Alert for event ${data.event_id} on camera ${data.camera}: ${data.status} (${channels})`
+    );
+  });
+  source.onerror = (error) => console.error("Fall status stream error:", error);
+}
+
+subscribeFallStatus();
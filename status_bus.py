@@ -0,0 +1,64 @@
+import json
+import queue
+import threading
+
+
+class StatusBus:
+    """
+    Fan-out of status changes (fall started, fall cleared, alert sent) to Server-Sent Events
+    subscribers. Each subscriber has its own small bounded queue; a client that stops reading
+    loses its oldest pending events rather than holding up the publisher.
+    """
+
+    def __init__(self, maxsize=64):
+        self._maxsize = maxsize
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    @property
+    def subscribers(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event, data):
+        """Send one event to every subscriber without blocking."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            while True:
+                try:
+                    q.put_nowait((event, data))
+                    break
+                except queue.Full:
+                    try:
+                        q.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    def subscribe(self, snapshot=None, keepalive=15.0):
+        """
+        Yield SSE-formatted messages for as long as the client stays connected.
+        :param snapshot: Optional callable returning the current status, sent first as a "status" event.
+        :param keepalive: Seconds between comment lines that keep idle connections open.
+        """
+        q = queue.Queue(maxsize=self._maxsize)
+        with self._lock:
+            self._subscribers.add(q)
+        try:
+            if snapshot is not None:
+                yield format_sse("status", snapshot())
+            while True:
+                try:
+                    event, data = q.get(timeout=keepalive)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(event, data)
+        finally:
+            with self._lock:
+                self._subscribers.discard(q)
+
+
+def format_sse(event, data):
+    """Encode one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,48 @@
+import math
+
+import cv2
+
+
+def video_fps(cap, default=30.0):
+    """Native frame rate of an opened capture, falling back to `default` when unknown."""
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    return fps if fps and fps > 0 else default
+
+
+def iter_sampled_frames(video_path, target_fps=None, start_frame=0, end_frame=None):
+    """
+    Decode a video and yield frames sampled at `target_fps` without transcoding it first.
+    Frames that are not selected are only grabbed (demuxed and decoded) but never converted
+    to BGR arrays, which is where most of the per-frame cost of skipping lies.
+    :param video_path: Path of the video file.
+    :param target_fps: Desired output frame rate, None keeps every frame.
+    :param start_frame: Index of the first frame to consider.
+    :param end_frame: Index one past the last frame to consider, None reads to the end.
+    :return: Generator of (frame_index, timestamp_seconds, frame) tuples.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise FileNotFoundError(f"Could not open video file: {video_path}")
+    try:
+        fps = video_fps(cap)
+        step = fps / target_fps if target_fps and target_fps < fps else 1.0
+        if start_frame:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+        frame_index = start_frame
+        # First point of the sampling grid that a read from frame 0 would select at or after
+        # start_frame, so segments decoded separately sample exactly the same frames.
+        next_sample = (math.floor((start_frame - 0.5) / step) + 1) * step
+        while end_frame is None or frame_index < end_frame:
+            if frame_index + 0.5 < next_sample:
+                if not cap.grab():
+                    break
+            else:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                yield frame_index, frame_index / fps, frame
+                next_sample += step
+            frame_index += 1
+    finally:
+        cap.release()
@@ -0,0 +1,113 @@
+import glob
+import time
+
+import cv2
+
+from video_io import video_fps
+
+PREFIX = "virtual:"
+
+
+def is_virtual(source):
+    return str(source).startswith(PREFIX)
+
+
+class VirtualCamera:
+    """
+    Drop-in stand-in for `cv2.VideoCapture(0)` that plays video files as a live camera: frames
+    are delivered at the files' native frame rate, frames are skipped when the reader falls
+    behind (a real camera does not wait either), and playback loops over the files forever.
+    """
+
+    def __init__(self, paths, loop=True, fps=None):
+        """
+        :param paths: A video path, a glob pattern or a list of them, e.g. "TestFiles/*.mp4".
+        :param loop: Start over after the last file instead of reporting end of stream.
+        :param fps: Playback frame rate, defaults to each file's own rate.
+        """
+        patterns = [paths] if isinstance(paths, str) else list(paths)
+        self.paths = [path for pattern in patterns for path in sorted(glob.glob(pattern))]
+        self.loop = loop
+        self.fps = fps
+        self.loops = 0
+        self._index = -1
+        self._cap = None
+        self._frame_interval = None
+        self._started = None
+        self._position = 0
+        self._next_file()
+
+    def _next_file(self):
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+        if not self.paths:
+            return False
+        self._index += 1
+        if self._index == len(self.paths):
+            if not self.loop:
+                return False
+            self._index = 0
+            self.loops += 1
+        self._cap = cv2.VideoCapture(self.paths[self._index])
+        if not self._cap.isOpened():
+            return False
+        self._frame_interval = 1.0 / (self.fps or video_fps(self._cap))
+        self._started = time.monotonic()
+        self._position = 0
+        return True
+
+    def isOpened(self):
+        return self._cap is not None and self._cap.isOpened()
+
+    def read(self):
+        """
+        Block until the next frame is due and return it like VideoCapture.read(). Frames whose
+        time already passed are grabbed without decoding them to BGR.
+        """
+        while self._cap is not None:
+            wait = self._started + self._position * self._frame_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            due = int((time.monotonic() - self._started) / self._frame_interval)
+            while self._position < due and self._cap.grab():
+                self._position += 1
+            ret, frame = self._cap.read()
+            if ret:
+                self._position += 1
+                return True, frame
+            if not self._next_file():
+                break
+        return False, None
+
+    def grab(self):
+        ret, _ = self.read()
+        return ret
+
+    def get(self, prop):
+        if self._cap is None:
+            return 0.0
+        if prop == cv2.CAP_PROP_FPS:
+            return 1.0 / self._frame_interval
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            # Live cameras have no frame count.
+            return -1.0
+        return self._cap.get(prop)
+
+    def set(self, prop, value):
+        return False
+
+    def release(self):
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+
+def open_capture(source):
+    """
+    Open a capture for a camera source: "virtual:<glob>" plays files as a looping real-time
+    camera, digits open a local device and anything else (RTSP URL, file) goes to OpenCV.
+    """
+    if is_virtual(source):
+        return VirtualCamera(source[len(PREFIX):])
+    return cv2.VideoCapture(int(source) if str(source).isdigit() else source)
@@ -1,18 +1,15 @@
-def send_whatsapp_alert(tonumber):
-    try:
-        from twilio.rest import Client
-        from dotenv import load_dotenv
-        import os
-        load_dotenv()
+import os
+
+from message import twilio_client
 
-        account_sid = os.getenv('TWILIO_ACCOUNT_SID')
-        auth_token = os.getenv('TWILIO_AUTH_TOKEN')
-        client = Client(account_sid, auth_token)
+
+def send_whatsapp_alert(tonumber, message_body='Fall Detected - Check Email for more information', raise_on_error=False):
+    try:
+        client = twilio_client()
 
         to_number = 'whatsapp:'+tonumber
         print(to_number)
         from_number = os.getenv('SENDER_WHATSAPP_NUMBER')
-        message_body = 'Fall Detected - Check Email for more information'
 
         message = client.messages.create(
             from_=from_number,
@@ -23,7 +20,9 @@ def send_whatsapp_alert(tonumber):
         return True
     except Exception as e:
         print(f"Error sending WhatsApp message: {e}")
+        if raise_on_error:
+            raise
         return False
 
 # if __name__ == "__main__":
-#     send_whatsapp_alert()
\ No newline at end of file
+#     send_whatsapp_alert()
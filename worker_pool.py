@@ -0,0 +1,37 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from backends import ensure_export, load_model
+
+# One model per worker process, loaded once by the pool initializer.
+_worker_model = None
+
+
+def _init_worker(model_path, backend, threads):
+    global _worker_model
+    # Every worker owns a slice of the cores; letting each one spread over all of them
+    # oversubscribes the CPU and stops the speed-up from scaling with the worker count.
+    cv2.setNumThreads(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _worker_model = load_model(model_path, backend)
+
+
+def worker_model():
+    """The model loaded in this worker process by the pool initializer."""
+    return _worker_model
+
+
+def create_pool(model_path, backend=None, workers=None):
+    """Process pool whose workers each hold a loaded model and an equal share of the cores."""
+    ensure_export(model_path, backend)
+    workers = workers or os.cpu_count() or 1
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_init_worker, initargs=(model_path, backend, threads))